@@ -0,0 +1,140 @@
+"""Benchmark money stored as REAL amounts against INTEGER cents.
+
+Seeds an expenses table with float amounts, times the analytics-style SUM/AVG
+aggregates and measures an (owner_id, amount) index, then migrates the same
+database to cents with migrate_money_to_cents and measures again. Also reports
+how far the float totals drift from the exact totals.
+Run with: python benchmarks/bench_cents.py
+"""
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from home_budget.app.migrations import migrate_money_to_cents
+
+EXPENSES = 1_000_000
+USERS = 1_000
+CATEGORIES = 10
+REPEATS = 3
+
+LEGACY_SCHEMA = """
+CREATE TABLE expenses (
+    id INTEGER PRIMARY KEY,
+    amount FLOAT NOT NULL,
+    description VARCHAR,
+    date DATETIME,
+    owner_id INTEGER,
+    category_id INTEGER
+)
+"""
+
+
+def seed(engine) -> dict:
+    """Fill the legacy table with EXPENSES float amounts and return the exact per-user totals in cents"""
+    rng = random.Random(39)
+    now = datetime.now()
+    exact: dict = {}
+    rows = []
+    for i in range(EXPENSES):
+        cents = rng.randint(1, 50_000)
+        owner_id = i % USERS + 1
+        exact[owner_id] = exact.get(owner_id, 0) + cents
+        rows.append({
+            "amount": float(Decimal(cents) / 100),
+            "description": f"Expense {i}",
+            "date": now - timedelta(minutes=i),
+            "owner_id": owner_id,
+            "category_id": i % CATEGORIES + 1
+        })
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_SCHEMA))
+        connection.execute(text(
+            "INSERT INTO expenses (amount, description, date, owner_id, category_id) "
+            "VALUES (:amount, :description, :date, :owner_id, :category_id)"
+        ), rows)
+    return exact
+
+
+def best_of(engine, sql: str) -> float:
+    timings = []
+    with engine.connect() as connection:
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            connection.execute(text(sql)).all()
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def index_bytes(engine, path: Path, column: str) -> int:
+    """Bytes an (owner_id, column) index adds to the database file"""
+    # VACUUM cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("DROP INDEX IF EXISTS ix_bench_amount"))
+        connection.execute(text("VACUUM"))
+        before = os.path.getsize(path)
+        connection.execute(text(f"CREATE INDEX ix_bench_amount ON expenses (owner_id, {column})"))
+        connection.execute(text("VACUUM"))
+        size = os.path.getsize(path) - before
+        connection.execute(text("DROP INDEX ix_bench_amount"))
+    return size
+
+
+def measure(engine, path: Path, column: str) -> dict:
+    return {
+        "SUM by user+category": best_of(
+            engine, f"SELECT owner_id, category_id, SUM({column}) FROM expenses GROUP BY owner_id, category_id"
+        ),
+        "AVG by category": best_of(engine, f"SELECT category_id, AVG({column}) FROM expenses GROUP BY category_id"),
+        "SUM all": best_of(engine, f"SELECT SUM({column}), COUNT(id) FROM expenses"),
+        "index bytes": index_bytes(engine, path, column),
+    }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            exact = seed(engine)
+
+            before = measure(engine, path, "amount")
+            with engine.connect() as connection:
+                float_totals = dict(connection.execute(
+                    text("SELECT owner_id, SUM(amount) FROM expenses GROUP BY owner_id")
+                ).all())
+            drifted = sum(1 for owner_id, total in float_totals.items() if total * 100 != exact[owner_id])
+            worst = max(abs(Decimal(repr(total)) - Decimal(exact[owner_id]) / 100) for owner_id, total in float_totals.items())
+
+            start = time.perf_counter()
+            migrate_money_to_cents(engine)
+            migration_time = time.perf_counter() - start
+
+            after = measure(engine, path, "amount_cents")
+            with engine.connect() as connection:
+                cents_totals = dict(connection.execute(
+                    text("SELECT owner_id, SUM(amount_cents) FROM expenses GROUP BY owner_id")
+                ).all())
+            mismatched = sum(1 for owner_id, total in cents_totals.items() if total != exact[owner_id])
+        finally:
+            engine.dispose()
+
+    print(f"{EXPENSES} expenses, {USERS} users, best of {REPEATS}")
+    print(f"{'':<22} {'REAL':>12} {'INTEGER cents':>14} {'change':>8}")
+    for name in before:
+        if name == "index bytes":
+            print(f"{name:<22} {before[name]:>12} {after[name]:>14} {after[name] / before[name] - 1:>+8.0%}")
+        else:
+            print(f"{name:<22} {before[name]:>11.4f}s {after[name]:>13.4f}s {before[name] / after[name]:>7.2f}x")
+    print(f"Migration: {migration_time:.2f}s")
+    print(f"Float per-user totals off the exact cents: {drifted}/{USERS} (worst {worst})")
+    print(f"Integer per-user totals off the exact cents: {mismatched}/{USERS}")
+
+
+if __name__ == "__main__":
+    main()
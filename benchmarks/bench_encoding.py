@@ -0,0 +1,102 @@
+"""Benchmark response encodings: encode CPU time against bytes on the wire.
+
+Encodes a typical expense list (50 rows), a large one (10k rows) and a year of
+daily analytics as JSON and MessagePack, each uncompressed, gzipped and brotli
+compressed with the settings CompressionMiddleware uses.
+Run with: python benchmarks/bench_encoding.py
+"""
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import brotli
+import orjson
+
+from home_budget.app.negotiation import GZIP_LEVEL, BROTLI_QUALITY
+from home_budget.app.serialization import format_dates, msgpack_dumps
+
+REPEATS = 5
+
+
+def expense_list(size: int) -> list:
+    """Expense list in the GET /expenses/ shape"""
+    now = datetime.now()
+    return [
+        {
+            "amount": (i % 500) + 0.99,
+            "description": f"Expense {i}",
+            "category_id": i % 10 + 1,
+            "id": i + 1,
+            "date": now - timedelta(minutes=i),
+            "owner_id": 1,
+            "category": {"name": f"Category {i % 10 + 1}", "id": i % 10 + 1}
+        }
+        for i in range(size)
+    ]
+
+
+def daily_analytics(days: int) -> dict:
+    """Daily breakdown in the GET /analytics/spending/daily shape"""
+    today = datetime.now().date()
+    return {
+        "period_days": days,
+        "total_spent": 12345.67,
+        "total_expenses": days * 3,
+        "average_daily_spending": 33.82,
+        "daily_breakdown": [
+            {"date": (today - timedelta(days=i)).isoformat(), "total_spent": round(10 + i * 0.37, 2), "expense_count": 3}
+            for i in range(days)
+        ]
+    }
+
+
+def gzip_compress(data: bytes) -> bytes:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def brotli_compress(data: bytes) -> bytes:
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def msgpack_encode(payload) -> bytes:
+    """MessagePack as the expense routes send it, with expense dates formatted before packing"""
+    if isinstance(payload, list):
+        payload = [dict(item) for item in payload]
+        format_dates(payload, "date")
+    return msgpack_dumps(payload)
+
+
+ENCODERS = {"json": orjson.dumps, "msgpack": msgpack_encode}
+COMPRESSORS = {"identity": lambda data: data, "gzip": gzip_compress, "br": brotli_compress}
+PAYLOADS = {
+    "expenses (50)": expense_list(50),
+    "expenses (10k)": expense_list(10_000),
+    "daily (365)": daily_analytics(365),
+}
+
+
+def best_of(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'payload':>14} {'encoding':>18} {'encode (ms)':>12} {'bytes':>10} {'ratio':>6}")
+    for payload_name, payload in PAYLOADS.items():
+        baseline = len(orjson.dumps(payload))
+        for encoder_name, encode in ENCODERS.items():
+            for compressor_name, compress in COMPRESSORS.items():
+                encode_and_compress = lambda: compress(encode(payload))
+                size = len(encode_and_compress())
+                elapsed = best_of(encode_and_compress)
+                label = encoder_name if compressor_name == "identity" else f"{encoder_name}+{compressor_name}"
+                print(f"{payload_name:>14} {label:>18} {elapsed * 1000:>12.3f} {size:>10} {size / baseline:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark the GET /expenses/ serialization paths.
+
+Compares the ORM + pydantic validation path against the plain row + orjson path
+at 1k, 10k and 100k expenses. Run with: python benchmarks/bench_expense_list.py
+"""
+import json
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from home_budget.app.database import Base
+from home_budget.app.models import User, Category, Expense
+from home_budget.app.crud import ExpenseCRUD
+from home_budget.app.schemas import ExpenseResponse
+from home_budget.app.serialization import expense_rows_to_dicts, json_response
+
+SIZES = [1_000, 10_000, 100_000]
+REPEATS = 3
+
+
+def seed(db, size: int) -> int:
+    """Create one user with `size` expenses spread over the categories"""
+    user = User(email="bench@example.com", hashed_password="x", balance_cents=0)
+    categories = [Category(name=f"Category {i}") for i in range(10)]
+    db.add(user)
+    db.add_all(categories)
+    db.flush()
+    
+    now = datetime.now()
+    db.bulk_insert_mappings(Expense, [
+        {
+            "amount_cents": (i % 500) * 100 + 99,
+            "description": f"Expense {i}",
+            "date": now,
+            "owner_id": user.id,
+            "category_id": categories[i % 10].id
+        }
+        for i in range(size)
+    ])
+    db.commit()
+    return user.id
+
+
+def orm_path(db, user_id: int) -> bytes:
+    """Previous path: ORM objects validated one by one, then JSON encoded"""
+    expenses = ExpenseCRUD.get_by_user(db, user_id)
+    payload = [ExpenseResponse.model_validate(e, from_attributes=True).model_dump(mode="json") for e in expenses]
+    return json.dumps(payload).encode()
+
+
+def row_path(db, user_id: int) -> bytes:
+    """Current path: plain rows serialized directly with orjson"""
+    rows = ExpenseCRUD.get_rows_by_user(db, user_id)
+    return json_response(expense_rows_to_dicts(rows)).body
+
+
+def best_of(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'rows':>8} {'orm+pydantic (s)':>18} {'rows+orjson (s)':>16} {'speedup':>8}")
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+            Base.metadata.create_all(bind=engine)
+            db = sessionmaker(bind=engine)()
+            try:
+                user_id = seed(db, size)
+                orm_time = best_of(lambda: (orm_path(db, user_id), db.expunge_all()))
+                row_time = best_of(row_path, db, user_id)
+            finally:
+                db.close()
+                engine.dispose()
+        print(f"{size:>8} {orm_time:>18.4f} {row_time:>16.4f} {orm_time / row_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
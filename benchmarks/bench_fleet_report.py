@@ -0,0 +1,83 @@
+"""Benchmark the fleet-wide analytics report against a per-user loop.
+
+The loop calls AnalyticsCRUD once per user, like a report built from the per-user
+endpoints; the report aggregates user ID partitions in a process pool.
+Run with: python benchmarks/bench_fleet_report.py
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from home_budget.app.database import Base
+from home_budget.app.models import User, Category, Expense
+from home_budget.app.crud import AnalyticsCRUD
+from home_budget.app.fleet_report import run_report
+
+USERS = 20_000
+EXPENSES_PER_USER = 10
+PARTITION_SIZE = 1_000
+WORKER_COUNTS = sorted({1, 2, 4, os.cpu_count() or 1})
+
+
+def seed(db):
+    """Create USERS users with EXPENSES_PER_USER expenses each over the last 60 days"""
+    db.add_all([Category(id=i, name=f"Category {i}") for i in range(1, 11)])
+    db.bulk_insert_mappings(User, [
+        {"id": user_id, "email": f"user{user_id}@example.com", "hashed_password": "x", "balance_cents": (user_id * 37) % 3000 * 100}
+        for user_id in range(1, USERS + 1)
+    ])
+    now = datetime.now()
+    db.bulk_insert_mappings(Expense, [
+        {
+            "amount_cents": (i % 50) * 100 + 99,
+            "description": f"Expense {i}",
+            "date": now - timedelta(days=i % 60),
+            "owner_id": i % USERS + 1,
+            "category_id": i % 10 + 1
+        }
+        for i in range(USERS * EXPENSES_PER_USER)
+    ])
+    db.commit()
+
+
+def per_user_loop(db, since: datetime):
+    """Baseline: one by-category query per user, merged in Python"""
+    totals = {}
+    for (user_id,) in db.query(User.id):
+        for category in AnalyticsCRUD.get_spending_by_category(db, user_id, since):
+            totals[category["category_id"]] = totals.get(category["category_id"], 0.0) + category["total_spent"]
+    return totals
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            seed(db)
+            start = time.perf_counter()
+            per_user_loop(db, datetime.now() - timedelta(days=30))
+            loop_time = time.perf_counter() - start
+        finally:
+            db.close()
+            engine.dispose()
+        
+        print(f"{USERS} users, {USERS * EXPENSES_PER_USER} expenses, {os.cpu_count()} CPUs")
+        print(f"{'method':>22} {'seconds':>8} {'users/s':>10}")
+        print(f"{'per-user loop':>22} {loop_time:>8.3f} {USERS / loop_time:>10.0f}")
+        for workers in WORKER_COUNTS:
+            start = time.perf_counter()
+            run_report(Path(tmp) / f"report-{workers}", partition_size=PARTITION_SIZE, workers=workers, urls=[url])
+            elapsed = time.perf_counter() - start
+            print(f"{f'report, {workers} workers':>22} {elapsed:>8.3f} {USERS / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
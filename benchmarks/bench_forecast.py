@@ -0,0 +1,112 @@
+"""Benchmark the GET /analytics/forecast model.
+
+Compares a per-row Python loop over the user's expenses against the vectorized
+NumPy model over daily aggregates, and against a cached call, for one user with
+two years of history. Run with: python benchmarks/bench_forecast.py
+"""
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from home_budget.app.database import Base
+from home_budget.app.models import User, Category, Expense
+from home_budget.app.forecast import SpendingForecast, FORECAST_HISTORY_DAYS
+
+HISTORY_DAYS = 730
+EXPENSES_PER_DAY = 20
+CATEGORIES = 10
+ALPHA = 0.05
+REPEATS = 3
+
+
+def seed(db) -> int:
+    """Create one user with EXPENSES_PER_DAY expenses a day over HISTORY_DAYS days"""
+    user = User(email="bench@example.com", hashed_password="x", balance_cents=0)
+    categories = [Category(name=f"Category {i}") for i in range(CATEGORIES)]
+    db.add(user)
+    db.add_all(categories)
+    db.flush()
+    
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.bulk_insert_mappings(Expense, [
+        {
+            "amount_cents": (i % 50) * 100 + 99,
+            "description": f"Expense {i}",
+            "date": now - timedelta(days=i // EXPENSES_PER_DAY, minutes=i % EXPENSES_PER_DAY),
+            "owner_id": user.id,
+            "category_id": categories[i % CATEGORIES].id
+        }
+        for i in range(HISTORY_DAYS * EXPENSES_PER_DAY)
+    ])
+    db.commit()
+    return user.id
+
+
+def loop_path(db, user_id: int) -> dict:
+    """Baseline: load every expense and smooth each category's series day by day in Python"""
+    today = datetime.now(timezone.utc).date()
+    start = today - timedelta(days=FORECAST_HISTORY_DAYS - 1)
+    series = {}
+    for expense in db.query(Expense).filter(Expense.owner_id == user_id).all():
+        day = expense.date.date()
+        if start <= day <= today:
+            days = series.setdefault(expense.category_id, {})
+            days[day] = days.get(day, 0.0) + expense.amount_cents / 100
+    
+    levels = {}
+    for category_id, days in series.items():
+        day, level = min(days), None
+        while day <= today:
+            value = days.get(day, 0.0)
+            level = value if level is None else ALPHA * value + (1 - ALPHA) * level
+            day += timedelta(days=1)
+        levels[category_id] = level
+    return levels
+
+
+def vectorized_path(db, user_id: int) -> dict:
+    """Current path without the cache: SQL daily aggregates and the NumPy model"""
+    return SpendingForecast.compute(db, user_id, datetime.now(timezone.utc).date(), ALPHA)
+
+
+def cached_path(db, user_id: int) -> dict:
+    """Current path with the cache warm: one version lookup"""
+    return SpendingForecast.for_user(db, user_id, ALPHA)
+
+
+def best_of(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            user_id = seed(db)
+            loop_time = best_of(lambda: (loop_path(db, user_id), db.expunge_all()))
+            vectorized_time = best_of(vectorized_path, db, user_id)
+            cached_path(db, user_id)
+            cached_time = best_of(cached_path, db, user_id)
+        finally:
+            db.close()
+            engine.dispose()
+    
+    print(f"{HISTORY_DAYS * EXPENSES_PER_DAY} expenses over {HISTORY_DAYS} days, {CATEGORIES} categories")
+    print(f"{'per-row loop (s)':>18} {'vectorized (s)':>16} {'cached (s)':>12}")
+    print(f"{loop_time:>18.4f} {vectorized_time:>16.4f} {cached_time:>12.4f}")
+    print(f"vectorized speedup {loop_time / vectorized_time:.1f}x, cached speedup {loop_time / cached_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark expense write throughput against the number of shards.
+
+Each worker process plays one user and creates expenses with one commit per write,
+like POST /expenses/ served by several app workers. Users are spread over the
+shards with the same modulo rule as ShardRouter.
+Run with: python benchmarks/bench_shard_writes.py
+"""
+import tempfile
+import time
+from multiprocessing import Process
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from home_budget.app.database import Base
+from home_budget.app.models import User, Category
+from home_budget.app.crud import ExpenseCRUD
+from home_budget.app.schemas import ExpenseCreate
+
+SHARD_COUNTS = [1, 2, 4, 8]
+WORKERS = 8
+WRITES_PER_WORKER = 200
+
+
+def shard_engine(tmp: Path, shard: int):
+    return create_engine(f"sqlite:///{tmp / f'shard{shard}.db'}", connect_args={"timeout": 30})
+
+
+def worker(tmp: Path, shard_count: int, user_id: int):
+    """Create WRITES_PER_WORKER expenses for one user on their shard"""
+    engine = shard_engine(tmp, user_id % shard_count)
+    db = sessionmaker(bind=engine)()
+    expense = ExpenseCreate(amount=9.99, description="Benchmark", category_id=1)
+    try:
+        for _ in range(WRITES_PER_WORKER):
+            ExpenseCRUD.create(db, expense, user_id)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def run(shard_count: int, tmp: Path) -> float:
+    """Return writes per second with WORKERS users spread over shard_count shards"""
+    user_ids = list(range(1, WORKERS + 1))
+    for shard in range(shard_count):
+        engine = shard_engine(tmp, shard)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Category(id=1, name="Food"))
+        db.add_all([
+            User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x", balance_cents=10**11)
+            for user_id in user_ids if user_id % shard_count == shard
+        ])
+        db.commit()
+        db.close()
+        engine.dispose()
+    
+    processes = [Process(target=worker, args=(tmp, shard_count, user_id)) for user_id in user_ids]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    
+    return WORKERS * WRITES_PER_WORKER / elapsed
+
+
+def main():
+    print(f"{'shards':>6} {'writes/s':>10} {'scaling':>8}")
+    baseline = None
+    for shard_count in SHARD_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            throughput = run(shard_count, Path(tmp))
+        baseline = baseline or throughput
+        print(f"{shard_count:>6} {throughput:>10.0f} {throughput / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
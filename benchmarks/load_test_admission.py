@@ -0,0 +1,127 @@
+"""Load test admission control.
+
+Two scenarios, each while another client polls the cheap GET /categories/ endpoint:
+
+- rate limit: one user floods expensive analytics requests and is throttled by
+  their token bucket (429)
+- saturation: many users, each within their analytics burst, send more uncached
+  analytics requests at once than the analytics class admits and queues, so the
+  excess is shed (503)
+
+Prints status counts, latency percentiles per endpoint and the analytics /metrics
+counters after each scenario.
+Run with: JWT_SECRET_KEY=secret python benchmarks/load_test_admission.py
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+ANALYTICS_REQUESTS = 400
+CATEGORY_REQUESTS = 400
+CONCURRENCY = 100
+
+# Saturation: users times requests each, every user staying within ANALYTICS_BURST
+SATURATION_USERS = 40
+SATURATION_REQUESTS_PER_USER = 10
+SATURATION_EXPENSES_PER_USER = 2000
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def fire(client, semaphore, method, url, headers, statuses, latencies):
+    async with semaphore:
+        start = time.perf_counter()
+        response = await client.request(method, url, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] += 1
+
+
+async def login(client, email):
+    credentials = {"email": email, "password": "secret123"}
+    await client.post("/auth/register", json=credentials)
+    token = (await client.post("/auth/login", json=credentials)).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_expenses(user_ids):
+    """Give every user enough expenses for their analytics to take real work"""
+    from sqlalchemy import insert
+    from home_budget.app.database import engine
+    from home_budget.app.models import Expense
+
+    rng = random.Random(32)
+    now = datetime.now()
+    rows = [
+        {
+            "amount_cents": rng.randint(100, 10_000),
+            "description": "Seeded",
+            "date": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+            "owner_id": user_id,
+            "category_id": rng.randint(1, 5)
+        }
+        for user_id in user_ids
+        for _ in range(SATURATION_EXPENSES_PER_USER)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Expense), rows)
+
+
+async def run(client, name, analytics_requests):
+    """Fire analytics requests alongside CATEGORY_REQUESTS category polls and print the results"""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    results = {endpoint: (Counter(), []) for endpoint in ("analytics", "categories")}
+    tasks = [
+        fire(client, semaphore, "GET", url, headers, *results["analytics"])
+        for url, headers in analytics_requests
+    ] + [
+        fire(client, semaphore, "GET", "/categories/", {}, *results["categories"])
+        for _ in range(CATEGORY_REQUESTS)
+    ]
+    random.Random(37).shuffle(tasks)
+
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name}: {len(tasks)} requests in {elapsed:.2f}s")
+    for endpoint, (statuses, latencies) in results.items():
+        print(
+            f"{endpoint:>12}: statuses {dict(statuses)} 503s {statuses[503]} "
+            f"p50 {percentile(latencies, 0.5) * 1000:.1f}ms p99 {percentile(latencies, 0.99) * 1000:.1f}ms"
+        )
+    print(f"{'metrics':>12}: {(await client.get('/metrics')).json()['admission']['analytics']}")
+
+
+async def main():
+    # The app creates its database in the working directory on import
+    os.chdir(tempfile.mkdtemp())
+    from home_budget.app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = await login(client, "load@example.com")
+        await run(client, "rate limit", [
+            ("/analytics/spending/by-category", headers) for _ in range(ANALYTICS_REQUESTS)
+        ])
+
+        users = [await login(client, f"load{i}@example.com") for i in range(SATURATION_USERS)]
+        seed_expenses([(await client.get("/auth/me", headers=user)).json()["id"] for user in users])
+        # A distinct window per request, so no result is served from the analytics cache
+        await run(client, "saturation", [
+            (f"/analytics/spending/daily?days={365 - request}", user)
+            for user in users
+            for request in range(SATURATION_REQUESTS_PER_USER)
+        ])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,219 @@
+import asyncio
+import math
+import os
+import threading
+import time
+
+from typing import Dict, Optional
+
+from home_budget.app.auth import decode_token
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class RouteClass:
+    """Concurrency limit and bounded wait queue for one class of routes"""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait  # Seconds a request may wait for a slot before it is rejected
+        self.in_flight = 0
+        self.queued = 0
+        # Moving average of request service time, for predicting queue waits
+        self.avg_service_time = 0.05
+        self.counters = {
+            "admitted": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "rate_limited": 0,
+        }
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_env(cls, name: str, concurrency: int, max_queue: int, max_wait: float) -> "RouteClass":
+        """Build a route class, with ADMISSION_<NAME>_CONCURRENCY/_QUEUE/_MAX_WAIT overrides"""
+        prefix = f"ADMISSION_{name.upper()}"
+        return cls(
+            name,
+            concurrency=int(_env_float(f"{prefix}_CONCURRENCY", concurrency)),
+            max_queue=int(_env_float(f"{prefix}_QUEUE", max_queue)),
+            max_wait=_env_float(f"{prefix}_MAX_WAIT", max_wait),
+        )
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def expected_wait(self) -> float:
+        """Predicted wait for a request joining the queue now"""
+        return (self.queued + 1) * self.avg_service_time / self.concurrency
+
+    def record_service_time(self, seconds: float):
+        self.avg_service_time = 0.9 * self.avg_service_time + 0.1 * seconds
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "avg_service_time": round(self.avg_service_time, 4),
+            **self.counters,
+        }
+
+
+class TokenBucket:
+    """Per-key token buckets refilled at `rate` tokens per second up to `burst`.
+
+    A bucket that has refilled completely is the same as a missing one, so idle
+    keys are evicted every `sweep_interval` seconds and memory tracks active keys.
+    """
+
+    def __init__(self, rate: float, burst: float, sweep_interval: float = 60.0):
+        self.rate = rate
+        self.burst = burst
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[str, list] = {}  # key -> [tokens, last refill time]
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def take(self, key: str) -> float:
+        """Take a token for key; return 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._evict_full(now)
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = [tokens - 1, now]
+                return 0.0
+            self._buckets[key] = [tokens, now]
+            return (1 - tokens) / self.rate
+
+    def _evict_full(self, now: float):
+        """Drop the buckets that have refilled to burst since their last use (caller holds the lock)"""
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if bucket[0] + (now - bucket[1]) * self.rate < self.burst
+        }
+        self._last_sweep = now
+
+
+ROUTE_CLASSES = {
+    route_class.name: route_class for route_class in [
+        # bcrypt hashing is CPU bound, a few at a time is all a worker can do
+        RouteClass.from_env("auth", concurrency=4, max_queue=16, max_wait=2.0),
+        RouteClass.from_env("write", concurrency=8, max_queue=64, max_wait=2.0),
+        RouteClass.from_env("analytics", concurrency=4, max_queue=16, max_wait=5.0),
+        RouteClass.from_env("read", concurrency=32, max_queue=256, max_wait=1.0),
+    ]
+}
+
+analytics_buckets = TokenBucket(
+    rate=_env_float("ANALYTICS_RATE_PER_SECOND", 2.0),
+    burst=_env_float("ANALYTICS_BURST", 10.0),
+)
+
+AUTH_PATHS = {"/auth/register", "/auth/token", "/auth/login"}
+
+
+def classify(method: str, path: str) -> str:
+    """Map a request to its route class"""
+    if path in AUTH_PATHS:
+        return "auth"
+    if path.startswith("/analytics"):
+        return "analytics"
+    if method in ("POST", "PUT", "PATCH", "DELETE"):
+        return "write"
+    return "read"
+
+
+def _user_key(headers: Dict[bytes, bytes], client: Optional[tuple]) -> str:
+    """Rate-limit key: the token's user, or the client address for anonymous requests"""
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization.lower().startswith("bearer "):
+        payload = decode_token(authorization[7:])
+        if payload is not None:
+            return f"user:{payload.get('uid') or payload.get('sub')}"
+    return f"client:{client[0] if client else 'unknown'}"
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float):
+    body = ('{"detail":"%s"}' % detail).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    """Bounds concurrency per route class and sheds load before queues grow unbounded.
+
+    Requests that would wait longer than their class's max_wait are rejected with
+    503 and Retry-After, and each user's analytics requests are rate limited (429).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = ROUTE_CLASSES[classify(scope["method"], scope["path"])]
+
+        if route_class.name == "analytics":
+            retry_after = analytics_buckets.take(_user_key(dict(scope["headers"]), scope.get("client")))
+            if retry_after:
+                route_class.counters["rate_limited"] += 1
+                await _reject(send, 429, "Too many analytics requests", retry_after)
+                return
+
+        # Shed immediately when the queue is full or the predicted wait misses the deadline
+        if route_class.queued >= route_class.max_queue:
+            route_class.counters["rejected_queue_full"] += 1
+            await _reject(send, 503, "Server overloaded, try again later", route_class.expected_wait())
+            return
+        if route_class.in_flight >= route_class.concurrency and route_class.expected_wait() > route_class.max_wait:
+            route_class.counters["rejected_deadline"] += 1
+            await _reject(send, 503, "Server overloaded, try again later", route_class.expected_wait())
+            return
+
+        route_class.queued += 1
+        try:
+            await asyncio.wait_for(route_class.semaphore.acquire(), timeout=route_class.max_wait)
+        except asyncio.TimeoutError:
+            route_class.counters["rejected_deadline"] += 1
+            await _reject(send, 503, "Server overloaded, try again later", route_class.expected_wait())
+            return
+        finally:
+            route_class.queued -= 1
+
+        route_class.counters["admitted"] += 1
+        route_class.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.in_flight -= 1
+            route_class.record_service_time(time.perf_counter() - start)
+            route_class.semaphore.release()
+
+
+def admission_metrics() -> Dict[str, Dict[str, float]]:
+    """Current admission control state and counters per route class"""
+    return {name: route_class.metrics() for name, route_class in ROUTE_CLASSES.items()}
@@ -0,0 +1,180 @@
+import asyncio
+import os
+import threading
+import time
+
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from home_budget.app.admission import ROUTE_CLASSES
+from home_budget.app.crud import AnalyticsCRUD, ChangeFeedCRUD
+from home_budget.app.database import SessionLocal
+from home_budget.app.sharding import ShardRouter
+from home_budget.app.versioned_cache import VersionedCache
+
+# How many analytics results are kept in memory
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "4096"))
+# Results cover windows ending "now", so they are recomputed after this long even without writes
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+# Quiet time after a user's last expense change before their analytics are precomputed
+ANALYTICS_WARMUP_DEBOUNCE_SECONDS = float(os.getenv("ANALYTICS_WARMUP_DEBOUNCE_SECONDS", "2"))
+# Users precomputed at the same time
+ANALYTICS_WARMUP_CONCURRENCY = int(os.getenv("ANALYTICS_WARMUP_CONCURRENCY", "1"))
+# Users waiting for warm-up; changes beyond this are dropped and computed on demand instead
+ANALYTICS_WARMUP_MAX_PENDING = int(os.getenv("ANALYTICS_WARMUP_MAX_PENDING", "10000"))
+# Warm-up only starts while at most this many foreground requests are in flight
+ANALYTICS_WARMUP_MAX_FOREGROUND = int(os.getenv("ANALYTICS_WARMUP_MAX_FOREGROUND", "0"))
+ANALYTICS_WARMUP_TICK_SECONDS = float(os.getenv("ANALYTICS_WARMUP_TICK_SECONDS", "0.5"))
+
+# Analytics results by name, each computed from (db, user_id, parameter)
+REPORTS: Dict[str, Callable[[Session, int, Any], Any]] = {
+    "total": lambda db, user_id, period: AnalyticsCRUD.get_total_spending(
+        db, user_id, AnalyticsCRUD.get_date_range_start(period)
+    ),
+    "by_category": lambda db, user_id, period: AnalyticsCRUD.get_spending_by_category(
+        db, user_id, AnalyticsCRUD.get_date_range_start(period)
+    ),
+    "daily": lambda db, user_id, days: AnalyticsCRUD.get_daily_spending(db, user_id, days),
+    "comparison": lambda db, user_id, period_days: AnalyticsCRUD.get_period_comparison(db, user_id, period_days),
+}
+# What a dashboard loads: each analytics route with its default parameters
+WARMUP_REPORTS: List[Tuple[str, Any]] = [
+    ("total", "all_time"),
+    ("by_category", "all_time"),
+    ("daily", 30),
+    ("comparison", 30),
+]
+
+
+class AnalyticsCache:
+    """Analytics results per user, valid while the user's change-feed high-water mark is unchanged.
+
+    Any expense write moves the high-water mark, so a cached result is only served
+    for the data it was computed from, and for at most ANALYTICS_CACHE_TTL_SECONDS.
+    """
+
+    # (user_id, report, parameter) -> result, by data version
+    _cache = VersionedCache(ANALYTICS_CACHE_SIZE, ttl=ANALYTICS_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def get(db: Session, user_id: int, report: str, parameter: Any) -> Any:
+        """Get a cached result for the user's current data, computing and storing it on a miss"""
+        version = ChangeFeedCRUD.get_high_water_mark(db, user_id)
+        result, _ = AnalyticsCache._cache.get_or_compute(
+            (user_id, report, parameter), version, lambda: REPORTS[report](db, user_id, parameter)
+        )
+        return result
+
+    @staticmethod
+    def metrics() -> Dict[str, int]:
+        return AnalyticsCache._cache.metrics()
+
+
+class AnalyticsWarmup:
+    """Precomputes the dashboard analytics of users whose expenses changed, during idle time.
+
+    Committed expense changes mark their user; once the user has been quiet for
+    ANALYTICS_WARMUP_DEBOUNCE_SECONDS their WARMUP_REPORTS are computed into the
+    AnalyticsCache on the shard primary. Warm-up only starts while foreground traffic
+    is at most ANALYTICS_WARMUP_MAX_FOREGROUND requests, runs at most
+    ANALYTICS_WARMUP_CONCURRENCY users at a time, and drops changes once
+    ANALYTICS_WARMUP_MAX_PENDING users are waiting; a dropped user is simply
+    computed on their next request.
+    """
+
+    _lock = threading.Lock()
+    # user_id -> monotonic time of their last committed expense change
+    _pending: Dict[int, float] = {}
+    counters = {"noted": 0, "dropped": 0, "warmed": 0, "failed": 0, "deferred_busy": 0}
+
+    @staticmethod
+    def note_change(user_id: int):
+        """Mark a user's analytics as stale, restarting their debounce window"""
+        with AnalyticsWarmup._lock:
+            if user_id not in AnalyticsWarmup._pending and len(AnalyticsWarmup._pending) >= ANALYTICS_WARMUP_MAX_PENDING:
+                AnalyticsWarmup.counters["dropped"] += 1
+                return
+            AnalyticsWarmup._pending[user_id] = time.monotonic()
+            AnalyticsWarmup.counters["noted"] += 1
+
+    @staticmethod
+    def take_due(limit: int) -> List[int]:
+        """Remove and return up to limit users whose debounce window has passed, longest waiting first"""
+        cutoff = time.monotonic() - ANALYTICS_WARMUP_DEBOUNCE_SECONDS
+        with AnalyticsWarmup._lock:
+            due = sorted(
+                (changed_at, user_id) for user_id, changed_at in AnalyticsWarmup._pending.items()
+                if changed_at <= cutoff
+            )[:limit]
+            for _, user_id in due:
+                del AnalyticsWarmup._pending[user_id]
+        return [user_id for _, user_id in due]
+
+    @staticmethod
+    def foreground_busy() -> bool:
+        """Check whether foreground requests are queued or above the warm-up threshold"""
+        route_classes = ROUTE_CLASSES.values()
+        if any(route_class.queued for route_class in route_classes):
+            return True
+        return sum(route_class.in_flight for route_class in route_classes) > ANALYTICS_WARMUP_MAX_FOREGROUND
+
+    @staticmethod
+    def warm_user(user_id: int):
+        """Compute a user's WARMUP_REPORTS into the cache, reading their shard primary"""
+        directory_db = SessionLocal()
+        try:
+            shard = ShardRouter.shard_for_user(directory_db, user_id=user_id)
+            with ShardRouter.user_session(directory_db, shard) as db:
+                for report, parameter in WARMUP_REPORTS:
+                    AnalyticsCache.get(db, user_id, report, parameter)
+        finally:
+            directory_db.close()
+
+    @staticmethod
+    def metrics() -> Dict[str, int]:
+        with AnalyticsWarmup._lock:
+            return {"pending": len(AnalyticsWarmup._pending), **AnalyticsWarmup.counters}
+
+
+@event.listens_for(Session, "after_commit")
+def _note_expense_changes(session: Session):
+    """Queue warm-up for the users whose expense changes were just committed"""
+    for user_id in session.info.pop("changed_users", ()):
+        AnalyticsWarmup.note_change(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_expense_changes(session: Session):
+    session.info.pop("changed_users", None)
+
+
+async def _warm(user_id: int):
+    try:
+        await asyncio.to_thread(AnalyticsWarmup.warm_user, user_id)
+        AnalyticsWarmup.counters["warmed"] += 1
+    except Exception as e:
+        AnalyticsWarmup.counters["failed"] += 1
+        print(f"Error warming analytics for user {user_id}: {e}")
+
+
+async def run_warmup(interval: float = ANALYTICS_WARMUP_TICK_SECONDS):
+    """Start warm-ups for due users every interval seconds while the server is idle, until cancelled"""
+    active: Set[asyncio.Task] = set()
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            free = ANALYTICS_WARMUP_CONCURRENCY - len(active)
+            if free <= 0:
+                continue
+            if AnalyticsWarmup.foreground_busy():
+                AnalyticsWarmup.counters["deferred_busy"] += 1
+                continue
+            for user_id in AnalyticsWarmup.take_due(free):
+                task = asyncio.create_task(_warm(user_id))
+                active.add(task)
+                task.add_done_callback(active.discard)
+    finally:
+        for task in active:
+            task.cancel()
@@ -0,0 +1,35 @@
+import os
+
+from datetime import datetime, timedelta
+
+from home_budget.app.database import session_factories
+from home_budget.app.crud import ArchiveCRUD
+from home_budget.app.sharding import create_all_tables
+
+# Expenses older than this many days are moved to cold storage
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+
+
+def archive_old_expenses(archive_after_days: int = ARCHIVE_AFTER_DAYS) -> int:
+    """Archive expenses older than the configured cutoff on every shard and return how many were moved"""
+    create_all_tables()
+    cutoff = datetime.now() - timedelta(days=archive_after_days)
+    archived = 0
+    
+    for shard, session_factory in enumerate(session_factories):
+        db = session_factory()
+        try:
+            shard_archived = ArchiveCRUD.archive_before(db, cutoff)
+            print(f"Shard {shard}: archived {shard_archived} expenses dated before {cutoff.isoformat()}")
+            archived += shard_archived
+        except Exception as e:
+            print(f"Error archiving expenses on shard {shard}: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    return archived
+
+if __name__ == "__main__":
+    archive_old_expenses()
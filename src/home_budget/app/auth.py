@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from home_budget.app.crud import UserCRUD
 from home_budget.app.models import User
+from home_budget.app.sharding import ShardRouter
 
 # JWT config from environment variables
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -29,8 +30,10 @@ def get_password_hash(password: str) -> str:
 
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    """Authenticate a user with email and password"""
-    user = UserCRUD.get_by_email(db, email)
+    """Authenticate a user with email and password (db is the directory session)"""
+    shard = ShardRouter.shard_for_user(db, email=email)
+    with ShardRouter.user_session(db, shard) as shard_db:
+        user = UserCRUD.get_by_email(shard_db, email)
     if not user:
         return None
     if not verify_password(password, user.hashed_password):
@@ -51,18 +54,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the email"""
+def decode_token(token: str) -> Optional[dict]:
+    """Verify a JWT token and return its claims"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT token and return the email"""
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    return email
+
+
 def get_current_user(db: Session, token: str) -> User:
     """Get current user from JWT token"""
     credentials_exception = HTTPException(
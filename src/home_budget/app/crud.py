@@ -1,9 +1,31 @@
+import os
+
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
-from home_budget.app.models import Category, User, Expense
-from home_budget.app.schemas import CategoryCreate, UserCreate, ExpenseCreate
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, and_, Row, Date, select, insert, update, delete, union_all, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import date, datetime, timedelta, timezone
+from home_budget.app.models import (
+    Category,
+    User,
+    Expense,
+    ExpenseChange,
+    ArchivedExpense,
+    ArchiveRollup,
+    ArchiveState,
+    Budget,
+    MonthlyCategoryTotal,
+    BalanceEntry,
+    BalanceSnapshot,
+    IdempotencyKey,
+    RecurringExpense
+)
+from home_budget.app.schemas import CategoryCreate, UserCreate, ExpenseCreate, RecurringExpenseCreate
+from home_budget.app.money import to_cents, from_cents
+
+# A balance snapshot is taken every this many ledger entries, bounding point-in-time replays
+BALANCE_SNAPSHOT_INTERVAL = int(os.getenv("BALANCE_SNAPSHOT_INTERVAL", "50"))
 
 
 class CategoryCRUD:
@@ -17,6 +39,12 @@ class CategoryCRUD:
         """Get category by name"""
         return db.query(Category).filter(Category.name == name).first()
     
+    @staticmethod
+    def get_by_ids(db: Session, category_ids: List[int]) -> Dict[int, Category]:
+        """Get categories by ID in a single query, keyed by ID"""
+        categories = db.query(Category).filter(Category.id.in_(category_ids)).all()
+        return {category.id: category for category in categories}
+    
     @staticmethod
     def get_all(db: Session) -> List[Category]:
         """Get all categories"""
@@ -72,20 +100,44 @@ class UserCRUD:
         return db.query(User).filter(User.email == email).first()
     
     @staticmethod
-    def create(db: Session, user: UserCreate, hashed_password: str) -> User:
-        """Create a new user"""
-        db_user = User(email=user.email, hashed_password=hashed_password)
+    def create(db: Session, user: UserCreate, hashed_password: str, user_id: Optional[int] = None) -> User:
+        """Create a new user, optionally with an ID allocated by the user directory"""
+        db_user = User(id=user_id, email=user.email, hashed_password=hashed_password)
         db.add(db_user)
+        db.flush()
+        LedgerCRUD.record(db, db_user, db_user.balance_cents, "opening")
         db.commit()
         db.refresh(db_user)
         return db_user
+    
+    @staticmethod
+    def refresh_balance(db: Session, user: User) -> int:
+        """Re-read the user's balance, which may have changed since the user was loaded"""
+        db.refresh(user, ["balance_cents"])
+        return user.balance_cents
+    
+    @staticmethod
+    def adjust_balance(db: Session, user: User, amount_cents: int) -> int:
+        """Add to the user's balance with a relative update, so a concurrent change is not overwritten (caller commits)"""
+        balance = db.execute(
+            update(User).where(User.id == user.id).values(balance_cents=User.balance_cents + amount_cents)
+            .returning(User.balance_cents).execution_options(synchronize_session=False)
+        ).scalar_one()
+        set_committed_value(user, "balance_cents", balance)
+        return balance
 
 
 class ExpenseCRUD:
     @staticmethod
     def get_by_id(db: Session, expense_id: int) -> Optional[Expense]:
-        """Get expense by ID"""
-        return db.query(Expense).filter(Expense.id == expense_id).first()
+        """Get expense by ID (served from the session identity map when already loaded)"""
+        return db.get(Expense, expense_id)
+    
+    @staticmethod
+    def get_by_ids(db: Session, expense_ids: List[int]) -> Dict[int, Expense]:
+        """Get expenses by ID in a single query, keyed by ID"""
+        expenses = db.query(Expense).filter(Expense.id.in_(expense_ids)).all()
+        return {expense.id: expense for expense in expenses}
     
     @staticmethod
     def get_by_user(db: Session, user_id: int) -> List[Expense]:
@@ -93,28 +145,655 @@ class ExpenseCRUD:
         return db.query(Expense).filter(Expense.owner_id == user_id).all()
     
     @staticmethod
-    def create(db: Session, expense: ExpenseCreate, user_id: int) -> Expense:
-        """Create a new expense"""
+    def get_rows_by_user(
+        db: Session,
+        user_id: int,
+        category_id: Optional[int] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        expense_ids: Optional[List[int]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Row]:
+        """Get a user's expenses as plain rows joined with their category, filtered in SQL.
+        
+        Archived expenses are included only when the date range reaches past the archive watermark.
+        """
+        sources = [Expense]
+        if ArchiveCRUD.range_needs_archive(db, start_date):
+            sources.append(ArchivedExpense)
+        
+        selects = []
+        for source in sources:
+            query = select(
+                source.id,
+                source.amount_cents,
+                source.description,
+                source.category_id,
+                source.date,
+                source.owner_id,
+                Category.name.label('category_name')
+            ).join(
+                Category, Category.id == source.category_id
+            ).where(
+                source.owner_id == user_id
+            )
+            
+            if category_id:
+                query = query.where(source.category_id == category_id)
+            if min_amount is not None:
+                query = query.where(source.amount_cents >= to_cents(min_amount))
+            if max_amount is not None:
+                query = query.where(source.amount_cents <= to_cents(max_amount))
+            if expense_ids is not None:
+                query = query.where(source.id.in_(expense_ids))
+            if start_date is not None:
+                query = query.where(source.date >= start_date)
+            if end_date is not None:
+                query = query.where(source.date < end_date)
+            selects.append(query)
+        
+        combined = union_all(*selects).subquery() if len(selects) > 1 else selects[0].subquery()
+        return db.execute(select(combined).order_by(combined.c.id)).all()
+    
+    @staticmethod
+    def create(db: Session, expense: ExpenseCreate, user_id: int, commit: bool = True) -> Expense:
+        """Create a new expense (flush only when commit is False)"""
         db_expense = Expense(
-            amount=expense.amount,
+            amount_cents=expense.amount_cents,
             description=expense.description,
             category_id=expense.category_id,
             owner_id=user_id
         )
         db.add(db_expense)
-        db.commit()
-        db.refresh(db_expense)
+        if commit:
+            db.commit()
+            db.refresh(db_expense)
+        else:
+            db.flush()
         return db_expense
     
     @staticmethod
-    def delete(db: Session, expense_id: int) -> bool:
-        """Delete an expense"""
+    def delete(db: Session, expense_id: int, commit: bool = True) -> bool:
+        """Delete an expense (flush only when commit is False)"""
         db_expense = ExpenseCRUD.get_by_id(db, expense_id)
         if db_expense:
             db.delete(db_expense)
+            if commit:
+                db.commit()
+            else:
+                db.flush()
+            return True
+        return False
+
+
+class ChangeFeedCRUD:
+    @staticmethod
+    def get_high_water_mark(db: Session, user_id: int) -> int:
+        """Get the latest change sequence number for a user (0 if nothing changed yet)"""
+        return db.query(func.max(ExpenseChange.seq)).filter(
+            ExpenseChange.owner_id == user_id
+        ).scalar() or 0
+    
+    @staticmethod
+    def record(db: Session, user_id: int, expense_id: int, operation: str) -> ExpenseChange:
+        """Record an expense change with the next per-user sequence number (caller commits)"""
+        change = ExpenseChange(
+            owner_id=user_id,
+            seq=ChangeFeedCRUD.get_high_water_mark(db, user_id) + 1,
+            expense_id=expense_id,
+            operation=operation
+        )
+        db.add(change)
+        # Flush so the next change recorded in this transaction sees this sequence number
+        db.flush()
+        # Lets commit listeners (analytics warm-up) see whose expenses changed
+        db.info.setdefault("changed_users", set()).add(user_id)
+        return change
+    
+    @staticmethod
+    def get_since(db: Session, user_id: int, since: int, limit: int) -> List[ExpenseChange]:
+        """Get up to `limit` changes after sequence number `since`, oldest first"""
+        return db.query(ExpenseChange).filter(
+            and_(
+                ExpenseChange.owner_id == user_id,
+                ExpenseChange.seq > since
+            )
+        ).order_by(ExpenseChange.seq).limit(limit).all()
+
+
+class LedgerCRUD:
+    @staticmethod
+    def record(db: Session, user: User, amount_cents: int, reason: str, expense_id: Optional[int] = None) -> BalanceEntry:
+        """Append a balance adjustment already applied to user.balance_cents (caller commits)"""
+        seq = (db.query(func.max(BalanceEntry.seq)).filter(BalanceEntry.owner_id == user.id).scalar() or 0) + 1
+        entry = BalanceEntry(
+            owner_id=user.id,
+            seq=seq,
+            amount_cents=amount_cents,
+            reason=reason,
+            expense_id=expense_id,
+            created_at=datetime.now(timezone.utc)
+        )
+        db.add(entry)
+        
+        # Checkpoint the balance so point-in-time queries never replay more than an interval
+        if seq % BALANCE_SNAPSHOT_INTERVAL == 0:
+            db.add(BalanceSnapshot(owner_id=user.id, seq=seq, balance_cents=user.balance_cents, taken_at=entry.created_at))
+        
+        # Flush so the next entry recorded in this transaction sees this sequence number
+        db.flush()
+        return entry
+    
+    @staticmethod
+    def balance_through(db: Session, user_id: int, seq: int) -> int:
+        """Balance in cents right after ledger entry `seq`: the latest snapshot at or before it plus the entries since"""
+        snapshot = db.query(BalanceSnapshot.seq, BalanceSnapshot.balance_cents).filter(
+            and_(
+                BalanceSnapshot.owner_id == user_id,
+                BalanceSnapshot.seq <= seq
+            )
+        ).order_by(BalanceSnapshot.seq.desc()).first()
+        base_seq, balance = snapshot if snapshot else (0, 0)
+        
+        replayed = db.query(func.sum(BalanceEntry.amount_cents)).filter(
+            and_(
+                BalanceEntry.owner_id == user_id,
+                BalanceEntry.seq > base_seq,
+                BalanceEntry.seq <= seq
+            )
+        ).scalar() or 0
+        return balance + replayed
+    
+    @staticmethod
+    def balance_at(db: Session, user_id: int, moment: datetime) -> Optional[Dict[str, Any]]:
+        """Get the balance as of a moment, or None if the ledger starts after it"""
+        last = db.query(BalanceEntry.seq, BalanceEntry.created_at).filter(
+            and_(
+                BalanceEntry.owner_id == user_id,
+                BalanceEntry.created_at <= moment
+            )
+        ).order_by(BalanceEntry.created_at.desc(), BalanceEntry.seq.desc()).first()
+        if last is None:
+            return None
+        
+        return {
+            "timestamp": moment,
+            "balance": from_cents(LedgerCRUD.balance_through(db, user_id, last.seq)),
+            "seq": last.seq,
+            "last_change_at": last.created_at
+        }
+    
+    @staticmethod
+    def get_history(
+        db: Session,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get ledger entries in a date range, oldest first, each with the balance after it"""
+        query = db.query(BalanceEntry).filter(BalanceEntry.owner_id == user_id)
+        if start_date:
+            query = query.filter(BalanceEntry.created_at >= start_date)
+        if end_date:
+            query = query.filter(BalanceEntry.created_at <= end_date)
+        entries = query.order_by(BalanceEntry.seq).limit(limit).all()
+        if not entries:
+            return []
+        
+        balance = LedgerCRUD.balance_through(db, user_id, entries[0].seq - 1)
+        history = []
+        for entry in entries:
+            balance += entry.amount_cents
+            history.append({
+                "seq": entry.seq,
+                "created_at": entry.created_at,
+                "amount": from_cents(entry.amount_cents),
+                "reason": entry.reason,
+                "expense_id": entry.expense_id,
+                "balance_after": from_cents(balance)
+            })
+        return history
+    
+    @staticmethod
+    def backfill_opening_entries(db: Session) -> int:
+        """Give users created before the ledger an opening entry for their current balance"""
+        has_entries = select(BalanceEntry.id).where(BalanceEntry.owner_id == User.id).exists()
+        result = db.execute(
+            insert(BalanceEntry).from_select(
+                ["owner_id", "seq", "amount_cents", "reason", "created_at"],
+                select(
+                    User.id,
+                    literal(1),
+                    User.balance_cents,
+                    literal("opening"),
+                    literal(datetime.now(timezone.utc))
+                ).where(~has_entries)
+            )
+        )
+        db.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def check_consistency(db: Session) -> List[Dict[str, Any]]:
+        """Replay every user's ledger and report where it disagrees with User.balance_cents or a snapshot"""
+        snapshots: Dict[Tuple[int, int], int] = {
+            (owner_id, seq): balance
+            for owner_id, seq, balance in db.query(
+                BalanceSnapshot.owner_id, BalanceSnapshot.seq, BalanceSnapshot.balance_cents
+            )
+        }
+        replayed: Dict[int, int] = {}
+        last_seq: Dict[int, int] = {}
+        problems = []
+        
+        # Integer cents replay exactly, so any difference is a real inconsistency
+        entries = db.query(BalanceEntry.owner_id, BalanceEntry.seq, BalanceEntry.amount_cents).order_by(
+            BalanceEntry.owner_id, BalanceEntry.seq
+        )
+        for owner_id, seq, amount in entries:
+            if seq != last_seq.get(owner_id, 0) + 1:
+                problems.append({"user_id": owner_id, "problem": "sequence gap", "seq": seq})
+            last_seq[owner_id] = seq
+            replayed[owner_id] = replayed.get(owner_id, 0) + amount
+            
+            snapshot = snapshots.get((owner_id, seq))
+            if snapshot is not None and snapshot != replayed[owner_id]:
+                problems.append({
+                    "user_id": owner_id, "problem": "snapshot mismatch", "seq": seq,
+                    "expected": from_cents(replayed[owner_id]), "actual": from_cents(snapshot)
+                })
+        
+        for user_id, balance in db.query(User.id, User.balance_cents):
+            if user_id not in replayed:
+                problems.append({"user_id": user_id, "problem": "no ledger entries"})
+            elif balance != replayed[user_id]:
+                problems.append({
+                    "user_id": user_id, "problem": "balance mismatch",
+                    "expected": from_cents(replayed[user_id]), "actual": from_cents(balance)
+                })
+        return problems
+
+
+class IdempotencyCRUD:
+    @staticmethod
+    def get(db: Session, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        """Get a user's stored idempotency key"""
+        return db.query(IdempotencyKey).filter(
+            and_(
+                IdempotencyKey.owner_id == user_id,
+                IdempotencyKey.key == key
+            )
+        ).first()
+    
+    @staticmethod
+    def save(
+        db: Session,
+        user_id: int,
+        key: str,
+        request_hash: str,
+        status_code: int,
+        response_body: bytes,
+        expires_at: datetime
+    ) -> IdempotencyKey:
+        """Store the outcome of a keyed request (caller commits, together with the write itself)"""
+        record = IdempotencyKey(
+            owner_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            status_code=status_code,
+            response_body=response_body,
+            expires_at=expires_at
+        )
+        db.add(record)
+        return record
+    
+    @staticmethod
+    def delete_expired(db: Session) -> int:
+        """Delete every expired idempotency key and return how many were removed"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+        db.commit()
+        return result.rowcount
+
+
+class RecurringCRUD:
+    @staticmethod
+    def get_by_id(db: Session, rule_id: int) -> Optional[RecurringExpense]:
+        """Get a recurring expense rule by ID"""
+        return db.get(RecurringExpense, rule_id)
+    
+    @staticmethod
+    def get_by_user(db: Session, user_id: int) -> List[RecurringExpense]:
+        """Get a user's recurring expense rules, oldest first"""
+        return db.query(RecurringExpense).filter(RecurringExpense.owner_id == user_id).order_by(RecurringExpense.id).all()
+    
+    @staticmethod
+    def create(db: Session, rule: RecurringExpenseCreate, user_id: int, start_date: datetime) -> RecurringExpense:
+        """Create a recurring expense rule whose first occurrence is at start_date (naive UTC)"""
+        db_rule = RecurringExpense(
+            owner_id=user_id,
+            category_id=rule.category_id,
+            amount_cents=rule.amount_cents,
+            description=rule.description,
+            frequency=rule.frequency.value,
+            interval_days=rule.interval_days,
+            start_date=start_date,
+            end_date=rule.end_date,
+            next_run_at=start_date
+        )
+        db.add(db_rule)
+        db.commit()
+        db.refresh(db_rule)
+        return db_rule
+    
+    @staticmethod
+    def delete(db: Session, rule_id: int) -> bool:
+        """Delete a recurring expense rule (expenses it already created stay)"""
+        db_rule = RecurringCRUD.get_by_id(db, rule_id)
+        if db_rule:
+            db.delete(db_rule)
             db.commit()
             return True
         return False
+    
+    @staticmethod
+    def get_due(db: Session, now: datetime, limit: int) -> List[RecurringExpense]:
+        """Get up to limit rules with an occurrence at or before now, most overdue first (index seek on next_run_at)"""
+        return db.query(RecurringExpense).filter(
+            RecurringExpense.next_run_at <= now
+        ).order_by(RecurringExpense.next_run_at, RecurringExpense.id).limit(limit).all()
+    
+    @staticmethod
+    def advance(
+        db: Session,
+        rule: RecurringExpense,
+        occurrences: int,
+        skipped: int,
+        next_run_at: Optional[datetime]
+    ) -> bool:
+        """Move a rule past its handled occurrences (caller commits).
+        
+        Only succeeds if no one else advanced the rule since it was read, so concurrent
+        schedulers never materialize the same occurrence twice.
+        """
+        result = db.execute(
+            update(RecurringExpense).where(
+                and_(
+                    RecurringExpense.id == rule.id,
+                    RecurringExpense.occurrences == rule.occurrences
+                )
+            ).values(
+                occurrences=occurrences,
+                skipped_occurrences=RecurringExpense.skipped_occurrences + skipped,
+                next_run_at=next_run_at
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+    
+    @staticmethod
+    def materialize(db: Session, occurrences: List[Tuple[RecurringExpense, datetime]], balances: Dict[int, int]):
+        """Insert the expenses of many (rule, date) occurrences in bulk (caller commits).
+        
+        Balances are updated once per user, and the change feed, ledger and month totals
+        get the same entries single expense creates would. balances holds each user's
+        balance in cents before these expenses.
+        """
+        if not occurrences:
+            return
+        now = datetime.now(timezone.utc)
+        expense_ids = db.execute(
+            insert(Expense).returning(Expense.id, sort_by_parameter_order=True),
+            [
+                {
+                    "amount_cents": rule.amount_cents,
+                    "description": rule.description,
+                    "date": moment,
+                    "owner_id": rule.owner_id,
+                    "category_id": rule.category_id
+                }
+                for rule, moment in occurrences
+            ]
+        ).scalars().all()
+        
+        user_ids = set(balances)
+        change_seqs = dict(db.query(ExpenseChange.owner_id, func.max(ExpenseChange.seq)).filter(
+            ExpenseChange.owner_id.in_(user_ids)
+        ).group_by(ExpenseChange.owner_id).all())
+        ledger_seqs = dict(db.query(BalanceEntry.owner_id, func.max(BalanceEntry.seq)).filter(
+            BalanceEntry.owner_id.in_(user_ids)
+        ).group_by(BalanceEntry.owner_id).all())
+        
+        changes, entries, snapshots = [], [], []
+        spent: Dict[int, int] = {}
+        month_totals: Dict[Tuple[int, int, str], List[int]] = {}
+        running = dict(balances)
+        for (rule, moment), expense_id in zip(occurrences, expense_ids):
+            user_id = rule.owner_id
+            change_seqs[user_id] = change_seqs.get(user_id, 0) + 1
+            changes.append({"owner_id": user_id, "seq": change_seqs[user_id], "expense_id": expense_id, "operation": "create"})
+            
+            ledger_seqs[user_id] = ledger_seqs.get(user_id, 0) + 1
+            running[user_id] -= rule.amount_cents
+            entries.append({
+                "owner_id": user_id, "seq": ledger_seqs[user_id], "amount_cents": -rule.amount_cents,
+                "reason": "expense_create", "expense_id": expense_id, "created_at": now
+            })
+            if ledger_seqs[user_id] % BALANCE_SNAPSHOT_INTERVAL == 0:
+                snapshots.append({
+                    "owner_id": user_id, "seq": ledger_seqs[user_id], "balance_cents": running[user_id], "taken_at": now
+                })
+            
+            spent[user_id] = spent.get(user_id, 0) + rule.amount_cents
+            total = month_totals.setdefault((user_id, rule.category_id, BudgetCRUD.month_key(moment)), [0, 0])
+            total[0] += rule.amount_cents
+            total[1] += 1
+        
+        db.execute(insert(ExpenseChange), changes)
+        db.execute(insert(BalanceEntry), entries)
+        if snapshots:
+            db.execute(insert(BalanceSnapshot), snapshots)
+        for (user_id, category_id, month), (amount_cents, count) in month_totals.items():
+            BudgetCRUD.add_to_month_total(db, user_id, category_id, month, amount_cents, count)
+        # Relative updates, so a concurrent expense write is not overwritten
+        for user_id, amount_cents in spent.items():
+            db.execute(
+                update(User).where(User.id == user_id).values(balance_cents=User.balance_cents - amount_cents)
+                .execution_options(synchronize_session=False)
+            )
+        
+        # Lets commit listeners (analytics warm-up) see whose expenses changed
+        db.info.setdefault("changed_users", set()).update(spent)
+
+
+class BudgetCRUD:
+    @staticmethod
+    def month_key(moment: datetime) -> str:
+        """Month bucket ("YYYY-MM") an expense dated at moment counts towards"""
+        return moment.strftime('%Y-%m')
+    
+    @staticmethod
+    def add_to_month_total(db: Session, user_id: int, category_id: int, month: str, amount_cents: int, count: int):
+        """Adjust a running month-to-date total in place (caller commits)"""
+        upsert = sqlite_insert(MonthlyCategoryTotal).values(
+            owner_id=user_id,
+            category_id=category_id,
+            month=month,
+            total_spent_cents=amount_cents,
+            expense_count=count
+        )
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=["owner_id", "category_id", "month"],
+            set_={
+                "total_spent_cents": MonthlyCategoryTotal.total_spent_cents + upsert.excluded.total_spent_cents,
+                "expense_count": MonthlyCategoryTotal.expense_count + upsert.excluded.expense_count
+            }
+        ))
+    
+    @staticmethod
+    def _status_query(db: Session, user_id: int, month: str):
+        """Budgets of a user with their month-to-date totals, one indexed join"""
+        return db.query(
+            Budget.category_id,
+            Budget.monthly_limit_cents,
+            Category.name.label('category_name'),
+            func.coalesce(MonthlyCategoryTotal.total_spent_cents, 0).label('spent_cents')
+        ).join(
+            Category, Category.id == Budget.category_id
+        ).outerjoin(
+            MonthlyCategoryTotal,
+            and_(
+                MonthlyCategoryTotal.owner_id == Budget.owner_id,
+                MonthlyCategoryTotal.category_id == Budget.category_id,
+                MonthlyCategoryTotal.month == month
+            )
+        ).filter(Budget.owner_id == user_id)
+    
+    @staticmethod
+    def _to_status(row: Row, month: str) -> Dict[str, Any]:
+        return {
+            "category_id": row.category_id,
+            "category_name": row.category_name,
+            "month": month,
+            "monthly_limit": from_cents(row.monthly_limit_cents),
+            "spent": from_cents(row.spent_cents),
+            "remaining": from_cents(row.monthly_limit_cents - row.spent_cents),
+            "over_budget": row.spent_cents > row.monthly_limit_cents
+        }
+    
+    @staticmethod
+    def get_status(db: Session, user_id: int, category_id: int, month: str) -> Optional[Dict[str, Any]]:
+        """Budget status of one category for a month (None if it has no budget)"""
+        row = BudgetCRUD._status_query(db, user_id, month).filter(Budget.category_id == category_id).first()
+        return BudgetCRUD._to_status(row, month) if row else None
+    
+    @staticmethod
+    def get_overview(db: Session, user_id: int, month: str) -> List[Dict[str, Any]]:
+        """Budget status of every budgeted category for a month"""
+        rows = BudgetCRUD._status_query(db, user_id, month).order_by(Category.name).all()
+        return [BudgetCRUD._to_status(row, month) for row in rows]
+    
+    @staticmethod
+    def get_by_category(db: Session, user_id: int, category_id: int) -> Optional[Budget]:
+        """Get a user's budget for a category"""
+        return db.query(Budget).filter(
+            and_(Budget.owner_id == user_id, Budget.category_id == category_id)
+        ).first()
+    
+    @staticmethod
+    def set_limit(db: Session, user_id: int, category_id: int, monthly_limit_cents: int) -> Budget:
+        """Create or update a user's budget for a category"""
+        db_budget = BudgetCRUD.get_by_category(db, user_id, category_id)
+        if db_budget:
+            db_budget.monthly_limit_cents = monthly_limit_cents
+        else:
+            db_budget = Budget(owner_id=user_id, category_id=category_id, monthly_limit_cents=monthly_limit_cents)
+            db.add(db_budget)
+        db.commit()
+        db.refresh(db_budget)
+        return db_budget
+    
+    @staticmethod
+    def delete(db: Session, user_id: int, category_id: int) -> bool:
+        """Delete a user's budget for a category"""
+        db_budget = BudgetCRUD.get_by_category(db, user_id, category_id)
+        if db_budget:
+            db.delete(db_budget)
+            db.commit()
+            return True
+        return False
+    
+    @staticmethod
+    def backfill_month_totals(db: Session):
+        """Build the running totals from the expenses table if they were never built"""
+        if db.query(MonthlyCategoryTotal.id).first() is not None:
+            return
+        month = func.strftime('%Y-%m', Expense.date)
+        rows = db.query(
+            Expense.owner_id,
+            Expense.category_id,
+            month.label('month'),
+            func.sum(Expense.amount_cents).label('total_spent_cents'),
+            func.count(Expense.id).label('expense_count')
+        ).group_by(Expense.owner_id, Expense.category_id, month).all()
+        db.add_all([MonthlyCategoryTotal(**row._asdict()) for row in rows])
+        db.commit()
+
+
+class ArchiveCRUD:
+    @staticmethod
+    def get_by_id(db: Session, expense_id: int) -> Optional[ArchivedExpense]:
+        """Get an archived expense by its original ID"""
+        return db.get(ArchivedExpense, expense_id)
+    
+    @staticmethod
+    def get_watermark(db: Session) -> Optional[datetime]:
+        """Get the archive watermark (every expense dated before it is archived)"""
+        return db.query(ArchiveState.archived_before).filter(ArchiveState.id == 1).scalar()
+    
+    @staticmethod
+    def range_needs_archive(db: Session, start_date: Optional[datetime]) -> bool:
+        """Check whether a date range starting at start_date (None = all time) reaches archived data"""
+        watermark = ArchiveCRUD.get_watermark(db)
+        if watermark is None:
+            return False
+        return start_date is None or start_date < watermark
+    
+    @staticmethod
+    def archive_before(db: Session, cutoff: datetime) -> int:
+        """Move expenses dated before cutoff to cold storage, folding them into the monthly rollups.
+        
+        Runs as a single transaction and returns the number of archived expenses.
+        """
+        hot = Expense.__table__
+        to_archive = hot.c.date < cutoff
+        columns = ["id", "amount_cents", "description", "date", "owner_id", "category_id"]
+        
+        # Fold the expenses being archived into the monthly rollups
+        month = func.strftime('%Y-%m', hot.c.date)
+        rollups = db.execute(
+            select(
+                hot.c.owner_id,
+                hot.c.category_id,
+                month.label('month'),
+                func.sum(hot.c.amount_cents).label('total_spent_cents'),
+                func.count(hot.c.id).label('expense_count')
+            ).where(to_archive).group_by(hot.c.owner_id, hot.c.category_id, month)
+        ).mappings().all()
+        
+        if not rollups:
+            ArchiveCRUD._raise_watermark(db, cutoff)
+            db.commit()
+            return 0
+        
+        upsert = sqlite_insert(ArchiveRollup).values([dict(rollup) for rollup in rollups])
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=["owner_id", "category_id", "month"],
+            set_={
+                "total_spent_cents": ArchiveRollup.total_spent_cents + upsert.excluded.total_spent_cents,
+                "expense_count": ArchiveRollup.expense_count + upsert.excluded.expense_count
+            }
+        ))
+        
+        # Copy the rows to cold storage and drop them from the hot table
+        db.execute(insert(ArchivedExpense).from_select(
+            columns, select(*[hot.c[name] for name in columns]).where(to_archive)
+        ))
+        archived = db.execute(delete(Expense).where(Expense.date < cutoff)).rowcount
+        
+        ArchiveCRUD._raise_watermark(db, cutoff)
+        db.commit()
+        return archived
+    
+    @staticmethod
+    def _raise_watermark(db: Session, cutoff: datetime):
+        """Move the watermark forward to cutoff (it never moves back)"""
+        state = db.get(ArchiveState, 1)
+        if state is None:
+            db.add(ArchiveState(id=1, archived_before=cutoff))
+        elif state.archived_before is None or state.archived_before < cutoff:
+            state.archived_before = cutoff
 
 
 class AnalyticsCRUD:
@@ -134,62 +813,104 @@ class AnalyticsCRUD:
         else:  # all_time
             return None
     
+    @staticmethod
+    def _sources(db: Session, start_date: Optional[datetime]) -> list:
+        """Get the expense tables a range starting at start_date has to read (cold one only if needed)"""
+        if ArchiveCRUD.range_needs_archive(db, start_date):
+            return [Expense, ArchivedExpense]
+        return [Expense]
+    
+    @staticmethod
+    def _sum_and_count(
+        db: Session,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[int, int]:
+        """Sum (in cents) and count a user's expenses in [start_date, end_date) across hot and cold storage"""
+        total_spent, expense_count = 0, 0
+        for source in AnalyticsCRUD._sources(db, start_date):
+            if source is ArchivedExpense and start_date is None and end_date is None:
+                # All-time archived totals come straight from the rollups
+                query = db.query(
+                    func.sum(ArchiveRollup.total_spent_cents),
+                    func.sum(ArchiveRollup.expense_count)
+                ).filter(ArchiveRollup.owner_id == user_id)
+            else:
+                query = db.query(func.sum(source.amount_cents), func.count(source.id)).filter(source.owner_id == user_id)
+                if start_date:
+                    query = query.filter(source.date >= start_date)
+                if end_date:
+                    query = query.filter(source.date < end_date)
+            
+            source_total, source_count = query.one()
+            total_spent += source_total or 0
+            expense_count += source_count or 0
+        
+        return total_spent, expense_count
+    
     @staticmethod
     def get_total_spending(db: Session, user_id: int, start_date: Optional[datetime] = None) -> Dict[str, Any]:
         """Get total spending for a user with optional date filter"""
-        # Base query for total spending
-        query = db.query(func.sum(Expense.amount)).filter(Expense.owner_id == user_id)
-        if start_date:
-            query = query.filter(Expense.date >= start_date)
-        
-        total_spent = query.scalar() or 0.0
-        
-        # Get expense count
-        count_query = db.query(func.count(Expense.id)).filter(Expense.owner_id == user_id)
-        if start_date:
-            count_query = count_query.filter(Expense.date >= start_date)
-        
-        expense_count = count_query.scalar() or 0
+        total_spent, expense_count = AnalyticsCRUD._sum_and_count(db, user_id, start_date)
         avg_per_expense = total_spent / expense_count if expense_count > 0 else 0.0
         
         return {
-            "total_spent": round(total_spent, 2),
+            "total_spent": from_cents(total_spent),
             "expense_count": expense_count,
-            "average_per_expense": round(avg_per_expense, 2)
+            "average_per_expense": round(from_cents(avg_per_expense), 2)
         }
     
     @staticmethod
     def get_spending_by_category(db: Session, user_id: int, start_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Get spending breakdown by category"""
-        query = db.query(
-            Category.name,
-            Category.id,
-            func.sum(Expense.amount).label('total_spent'),
-            func.count(Expense.id).label('expense_count'),
-            func.avg(Expense.amount).label('average_amount')
-        ).join(
-            Expense, Category.id == Expense.category_id
-        ).filter(
-            Expense.owner_id == user_id
-        ).group_by(Category.id, Category.name)
-        
-        if start_date:
-            query = query.filter(Expense.date >= start_date)
-        
-        results = query.all()
+        # Per category: [name, total_spent, expense_count], merged across hot and cold storage
+        merged: Dict[int, list] = {}
+        for source in AnalyticsCRUD._sources(db, start_date):
+            if source is ArchivedExpense and start_date is None:
+                # All-time archived totals come straight from the rollups
+                query = db.query(
+                    Category.name,
+                    Category.id,
+                    func.sum(ArchiveRollup.total_spent_cents).label('total_spent'),
+                    func.sum(ArchiveRollup.expense_count).label('expense_count')
+                ).join(
+                    ArchiveRollup, Category.id == ArchiveRollup.category_id
+                ).filter(
+                    ArchiveRollup.owner_id == user_id
+                ).group_by(Category.id, Category.name)
+            else:
+                query = db.query(
+                    Category.name,
+                    Category.id,
+                    func.sum(source.amount_cents).label('total_spent'),
+                    func.count(source.id).label('expense_count')
+                ).join(
+                    source, Category.id == source.category_id
+                ).filter(
+                    source.owner_id == user_id
+                ).group_by(Category.id, Category.name)
+                
+                if start_date:
+                    query = query.filter(source.date >= start_date)
+            
+            for result in query.all():
+                entry = merged.setdefault(result.id, [result.name, 0, 0])
+                entry[1] += result.total_spent
+                entry[2] += result.expense_count
         
         # Calculate total for percentage calculation
-        total_spent = sum(result.total_spent for result in results)
+        total_spent = sum(entry[1] for entry in merged.values())
         
         category_breakdown = []
-        for result in results:
-            percentage = (result.total_spent / total_spent * 100) if total_spent > 0 else 0
+        for category_id, (name, category_total, expense_count) in merged.items():
+            percentage = (category_total / total_spent * 100) if total_spent > 0 else 0
             category_breakdown.append({
-                "category_id": result.id,
-                "category_name": result.name,
-                "total_spent": round(result.total_spent, 2),
-                "expense_count": result.expense_count,
-                "average_amount": round(result.average_amount, 2),
+                "category_id": category_id,
+                "category_name": name,
+                "total_spent": from_cents(category_total),
+                "expense_count": expense_count,
+                "average_amount": round(from_cents(category_total / expense_count), 2),
                 "percentage_of_total": round(percentage, 2)
             })
         
@@ -203,31 +924,62 @@ class AnalyticsCRUD:
         """Get daily spending breakdown for the last N days"""
         start_date = datetime.now() - timedelta(days=days)
         
-        daily_data = db.query(
-            func.date(Expense.date).label('expense_date'),
-            func.sum(Expense.amount).label('daily_total'),
-            func.count(Expense.id).label('daily_count')
-        ).filter(
-            and_(
-                Expense.owner_id == user_id,
-                Expense.date >= start_date
-            )
-        ).group_by(
-            func.date(Expense.date)
-        ).order_by(
-            func.date(Expense.date)
-        ).all()
+        # Per day: [total_spent, expense_count], merged across hot and cold storage
+        merged: Dict[date, list] = {}
+        for source in AnalyticsCRUD._sources(db, start_date):
+            expense_date = func.date(source.date, type_=Date)
+            daily_data = db.query(
+                expense_date.label('expense_date'),
+                func.sum(source.amount_cents).label('daily_total'),
+                func.count(source.id).label('daily_count')
+            ).filter(
+                and_(
+                    source.owner_id == user_id,
+                    source.date >= start_date
+                )
+            ).group_by(
+                expense_date
+            ).all()
+            
+            for row in daily_data:
+                entry = merged.setdefault(row.expense_date, [0, 0])
+                entry[0] += row.daily_total
+                entry[1] += row.daily_count
         
         daily_breakdown = []
-        for row in daily_data:
+        for expense_date in sorted(merged):
+            daily_total, daily_count = merged[expense_date]
             daily_breakdown.append({
-                "date": row.expense_date.isoformat(),
-                "total_spent": round(row.daily_total, 2),
-                "expense_count": row.daily_count
+                "date": expense_date.isoformat(),
+                "total_spent": from_cents(daily_total),
+                "expense_count": daily_count
             })
         
         return daily_breakdown
     
+    @staticmethod
+    def get_daily_category_totals(db: Session, user_id: int, start_date: datetime) -> List[Tuple[date, int, int]]:
+        """Get (day, category ID, total spent in cents) aggregates since start_date across hot and cold storage.
+
+        A day and category can appear once per storage tier; callers sum duplicates.
+        """
+        totals = []
+        for source in AnalyticsCRUD._sources(db, start_date):
+            expense_date = func.date(source.date, type_=Date)
+            totals.extend(db.query(
+                expense_date,
+                source.category_id,
+                func.sum(source.amount_cents)
+            ).filter(
+                and_(
+                    source.owner_id == user_id,
+                    source.date >= start_date
+                )
+            ).group_by(
+                expense_date, source.category_id
+            ).all())
+        return totals
+    
     @staticmethod
     def get_period_comparison(db: Session, user_id: int, period_days: int) -> Dict[str, Any]:
         """Compare spending between current and previous period"""
@@ -235,23 +987,12 @@ class AnalyticsCRUD:
         
         # Current period
         current_start = now - timedelta(days=period_days)
-        current_spending = db.query(func.sum(Expense.amount)).filter(
-            and_(
-                Expense.owner_id == user_id,
-                Expense.date >= current_start
-            )
-        ).scalar() or 0.0
+        current_spending, _ = AnalyticsCRUD._sum_and_count(db, user_id, current_start)
         
         # Previous period
         previous_start = now - timedelta(days=period_days * 2)
         previous_end = now - timedelta(days=period_days)
-        previous_spending = db.query(func.sum(Expense.amount)).filter(
-            and_(
-                Expense.owner_id == user_id,
-                Expense.date >= previous_start,
-                Expense.date < previous_end
-            )
-        ).scalar() or 0.0
+        previous_spending, _ = AnalyticsCRUD._sum_and_count(db, user_id, previous_start, previous_end)
         
         # Calculate metrics
         difference = current_spending - previous_spending
@@ -260,10 +1001,9 @@ class AnalyticsCRUD:
             percentage_change = (difference / previous_spending) * 100
         
         return {
-            "current_spending": round(current_spending, 2),
-            "previous_spending": round(previous_spending, 2),
-            "difference": round(difference, 2),
+            "current_spending": from_cents(current_spending),
+            "previous_spending": from_cents(previous_spending),
+            "difference": from_cents(difference),
             "percentage_change": round(percentage_change, 2),
             "trend": "increased" if difference > 0 else "decreased" if difference < 0 else "unchanged"
         }
-    
@@ -1,18 +1,48 @@
+import os
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./home_budget.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Shard 0 is always SQLALCHEMY_DATABASE_URL and also holds the user directory and the
+# master copy of the categories. Extra shards are given as comma separated URLs.
+SHARD_DATABASE_URLS = [SQLALCHEMY_DATABASE_URL] + [
+    url.strip() for url in os.getenv("SHARD_DATABASE_URLS", "").split(",") if url.strip()
+]
+
+engines = [
+    create_engine(url, connect_args={"check_same_thread": False})
+    for url in SHARD_DATABASE_URLS
+]
+engine = engines[0]
+
+session_factories = [
+    sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+    for shard_engine in engines
+]
+SessionLocal = session_factories[0]
+
+# Read replicas per shard, comma separated: REPLICA_DATABASE_URLS for shard 0 and
+# REPLICA_DATABASE_URLS_<shard> for the others
+def _replica_urls(shard: int) -> list:
+    variable = "REPLICA_DATABASE_URLS" if shard == 0 else f"REPLICA_DATABASE_URLS_{shard}"
+    return [url.strip() for url in os.getenv(variable, "").split(",") if url.strip()]
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = [
+    [create_engine(url, connect_args={"check_same_thread": False}) for url in _replica_urls(shard)]
+    for shard in range(len(engines))
+]
+replica_session_factories = [
+    [sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) for replica_engine in shard_replicas]
+    for shard_replicas in replica_engines
+]
 
 Base = declarative_base()
 
 def get_db():
+    """Session on shard 0, for the user directory and shared reference data"""
     db = SessionLocal()
     try:
         yield db
@@ -1,13 +1,71 @@
+from typing import Optional, Tuple
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from home_budget.app.database import get_db
-from home_budget.app.auth import get_current_user
+from home_budget.app.database import SessionLocal, replica_engines
+from home_budget.app.auth import get_current_user, decode_token
+from home_budget.app.sharding import ShardRouter, SHARD_COUNT
+from home_budget.app.replication import ReplicaRouter, SHARED_DATA_KEY
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user_dependency(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def resolve_token(token: str) -> Tuple[int, Optional[int]]:
+    """Find the shard and ID of the token's user (shard 0 for invalid tokens, which fail auth anyway)"""
+    if SHARD_COUNT == 1 and not replica_engines[0]:
+        return 0, None
+    payload = decode_token(token)
+    if payload is None:
+        return 0, None
+    
+    user_id = payload.get("uid")
+    if SHARD_COUNT == 1:
+        return 0, user_id
+    
+    directory_db = SessionLocal()
+    try:
+        # Tokens carry the user ID; older ones only have the email
+        return ShardRouter.shard_for_user(directory_db, user_id=user_id, email=payload.get("sub")), user_id
+    finally:
+        directory_db.close()
+
+def get_user_db(token: str = Depends(oauth2_scheme)):
+    """Write session on the primary of the shard holding the authenticated user"""
+    db = ReplicaRouter.write_session(*resolve_token(token))
+    try:
+        yield db
+    finally:
+        ReplicaRouter.release(db)
+
+def get_user_read_db(token: str = Depends(oauth2_scheme)):
+    """Read session for the authenticated user, on a replica unless they wrote recently"""
+    db = ReplicaRouter.read_session(*resolve_token(token))
+    try:
+        yield db
+    finally:
+        ReplicaRouter.release(db)
+
+def get_shared_write_db():
+    """Write session on shard 0 for shared reference data; commits pin its reads to the primary for a while"""
+    db = ReplicaRouter.write_session(0, SHARED_DATA_KEY)
+    try:
+        yield db
+    finally:
+        ReplicaRouter.release(db)
+
+def get_read_db():
+    """Read session on shard 0 for shared reference data, on a replica unless it was just written"""
+    db = ReplicaRouter.read_session(0, SHARED_DATA_KEY)
+    try:
+        yield db
+    finally:
+        ReplicaRouter.release(db)
+
+def get_current_user_dependency(token: str = Depends(oauth2_scheme), db: Session = Depends(get_user_db)):
     """Dependency to get current authenticated user"""
+    return get_current_user(db, token)
+
+def get_current_user_read_dependency(token: str = Depends(oauth2_scheme), db: Session = Depends(get_user_read_db)):
+    """Dependency to get current authenticated user for read-only routes"""
     return get_current_user(db, token)
\ No newline at end of file
@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, select, func, case, and_, union_all
+from sqlalchemy.engine import Engine
+
+from home_budget.app.database import engines, replica_engines
+from home_budget.app.models import User, Category, Expense, ArchivedExpense
+from home_budget.app.money import CENTS_PER_UNIT, from_cents
+
+# Users per partition
+FLEET_REPORT_PARTITION_SIZE = int(os.getenv("FLEET_REPORT_PARTITION_SIZE", "5000"))
+# Balance distribution buckets, by lower edge
+BALANCE_BUCKETS = [0, 100, 500, 1000, 2000, 5000]
+BALANCE_BUCKET_LABELS = ["<0"] + [
+    f"{low}-{high}" for low, high in zip(BALANCE_BUCKETS, BALANCE_BUCKETS[1:])
+] + [f"{BALANCE_BUCKETS[-1]}+"]
+
+# Engines of this worker process, by URL
+_worker_engines: Dict[str, Engine] = {}
+
+
+def read_urls() -> List[str]:
+    """URL to read each shard from: its first replica, or the primary when it has none"""
+    return [
+        (shard_replicas[0] if shard_replicas else shard_engine).url.render_as_string(hide_password=False)
+        for shard_engine, shard_replicas in zip(engines, replica_engines)
+    ]
+
+
+def _engine(url: str) -> Engine:
+    """This process's engine for a URL, never one inherited from the parent process"""
+    if url not in _worker_engines:
+        _worker_engines[url] = create_engine(url)
+    return _worker_engines[url]
+
+
+def aggregate_partition(url: str, first_id: int, last_id: int, since: datetime, output_path: str) -> Dict[str, Any]:
+    """Aggregate the users with IDs in [first_id, last_id] on one shard and save the partial result"""
+    users = User.__table__
+    balance_bucket = case(
+        *[(users.c.balance_cents < edge * CENTS_PER_UNIT, index) for index, edge in enumerate(BALANCE_BUCKETS)],
+        else_=len(BALANCE_BUCKETS)
+    )
+    in_window = [
+        and_(table.c.owner_id.between(first_id, last_id), table.c.date >= since)
+        for table in (Expense.__table__, ArchivedExpense.__table__)
+    ]
+    expense_tables = list(zip((Expense.__table__, ArchivedExpense.__table__), in_window))
+
+    # Amounts stay in integer cents until the partials are merged
+    balances: Dict[str, List[int]] = {}
+    categories: Dict[str, List[int]] = {}
+    with _engine(url).connect() as connection:
+        for bucket, user_count, balance_sum, balance_min, balance_max in connection.execute(
+            select(
+                balance_bucket,
+                func.count(users.c.id),
+                func.sum(users.c.balance_cents),
+                func.min(users.c.balance_cents),
+                func.max(users.c.balance_cents)
+            ).where(users.c.id.between(first_id, last_id)).group_by(balance_bucket)
+        ):
+            balances[BALANCE_BUCKET_LABELS[bucket]] = [user_count, balance_sum, balance_min, balance_max]
+
+        for table, condition in expense_tables:
+            for category_id, total_spent, expense_count in connection.execute(
+                select(table.c.category_id, func.sum(table.c.amount_cents), func.count(table.c.id))
+                .where(condition)
+                .group_by(table.c.category_id)
+            ):
+                entry = categories.setdefault(str(category_id), [0, 0])
+                entry[0] += total_spent
+                entry[1] += expense_count
+
+        spenders = union_all(*[select(table.c.owner_id).where(condition) for table, condition in expense_tables]).subquery()
+        active_users = connection.execute(select(func.count(func.distinct(spenders.c.owner_id)))).scalar()
+
+    partial = {"active_users": active_users, "balances": balances, "categories": categories}
+
+    # Write then rename, so a partition file only exists once it is complete
+    temporary_path = f"{output_path}.tmp"
+    with open(temporary_path, "w") as partition_file:
+        json.dump(partial, partition_file)
+    os.replace(temporary_path, output_path)
+    return partial
+
+
+def plan_partitions(urls: List[str], partition_size: int) -> List[Dict[str, Any]]:
+    """Split each shard's user ID range into partitions of partition_size IDs"""
+    users = User.__table__
+    partitions = []
+    for shard, url in enumerate(urls):
+        with _engine(url).connect() as connection:
+            first_id, last_id = connection.execute(select(func.min(users.c.id), func.max(users.c.id))).one()
+        if first_id is None:
+            continue
+        for start in range(first_id, last_id + 1, partition_size):
+            end = min(start + partition_size - 1, last_id)
+            partitions.append({"shard": shard, "first_id": start, "last_id": end, "name": f"shard{shard}-{start}-{end}"})
+    return partitions
+
+
+def merge_partials(partials: List[Dict[str, Any]], category_names: Dict[int, str]) -> Dict[str, Any]:
+    """Combine partition results into the report's users and spending sections"""
+    distribution = {label: 0 for label in BALANCE_BUCKET_LABELS}
+    user_count, active_users, balance_sum = 0, 0, 0
+    balance_min: Optional[int] = None
+    balance_max: Optional[int] = None
+    categories: Dict[int, List[int]] = {}
+
+    for partial in partials:
+        active_users += partial["active_users"]
+        for label, (count, total, low, high) in partial["balances"].items():
+            distribution[label] += count
+            user_count += count
+            balance_sum += total
+            balance_min = low if balance_min is None else min(balance_min, low)
+            balance_max = high if balance_max is None else max(balance_max, high)
+        for category_id, (total_spent, expense_count) in partial["categories"].items():
+            entry = categories.setdefault(int(category_id), [0, 0])
+            entry[0] += total_spent
+            entry[1] += expense_count
+
+    total_spent = sum(entry[0] for entry in categories.values())
+    by_category = [
+        {
+            "category_id": category_id,
+            "category_name": category_names.get(category_id),
+            "total_spent": from_cents(category_total),
+            "expense_count": expense_count,
+            "percentage_of_total": round(category_total / total_spent * 100, 2) if total_spent > 0 else 0.0
+        }
+        for category_id, (category_total, expense_count) in categories.items()
+    ]
+    by_category.sort(key=lambda x: x["total_spent"], reverse=True)
+
+    return {
+        "users": {
+            "total": user_count,
+            "active": active_users,
+            "balance": {
+                "total": from_cents(balance_sum),
+                "average": round(from_cents(balance_sum / user_count), 2) if user_count else 0.0,
+                "min": from_cents(balance_min) if balance_min is not None else None,
+                "max": from_cents(balance_max) if balance_max is not None else None,
+                "distribution": distribution
+            }
+        },
+        "spending": {
+            "total_spent": from_cents(total_spent),
+            "expense_count": sum(entry[1] for entry in categories.values()),
+            "by_category": by_category
+        }
+    }
+
+
+def run_report(
+    output_dir: Path,
+    days: int = 30,
+    partition_size: int = FLEET_REPORT_PARTITION_SIZE,
+    workers: Optional[int] = None,
+    urls: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Build the fleet report into output_dir/report.json.
+
+    Users are split into ID-range partitions per shard and a process pool aggregates them,
+    each worker reading over its own connection. Every finished partition is saved on its
+    own, so running again with the same output_dir only aggregates the missing ones.
+    """
+    urls = urls or read_urls()
+    partition_dir = output_dir / "partitions"
+    partition_dir.mkdir(parents=True, exist_ok=True)
+
+    # A restarted job keeps the window and partitioning it started with
+    job_path = output_dir / "job.json"
+    if job_path.exists():
+        job = json.loads(job_path.read_text())
+    else:
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+        job = {"since": since.isoformat(), "days": days, "partition_size": partition_size}
+        job["partitions"] = plan_partitions(urls, partition_size)
+        job_path.write_text(json.dumps(job, indent=2))
+    since = datetime.fromisoformat(job["since"])
+
+    pending = [p for p in job["partitions"] if not (partition_dir / f"{p['name']}.json").exists()]
+    print(f"{len(job['partitions'])} partitions, {len(pending)} to aggregate")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                aggregate_partition,
+                urls[p["shard"]], p["first_id"], p["last_id"], since, str(partition_dir / f"{p['name']}.json")
+            ): p["name"]
+            for p in pending
+        }
+        for future in as_completed(futures):
+            future.result()
+            print(f"Partition {futures[future]} done")
+    elapsed = time.perf_counter() - start
+
+    partials = [
+        json.loads((partition_dir / f"{p['name']}.json").read_text())
+        for p in job["partitions"]
+    ]
+    with _engine(urls[0]).connect() as connection:
+        category_names = dict(connection.execute(select(Category.__table__.c.id, Category.__table__.c.name)).all())
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "since": job["since"],
+        "days": job["days"],
+        "shards": len(urls),
+        "partitions": len(job["partitions"]),
+        "aggregation_seconds": round(elapsed, 3),
+        **merge_partials(partials, category_names)
+    }
+    (output_dir / "report.json").write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the fleet-wide analytics report")
+    parser.add_argument("--output-dir", type=Path, help="Job directory, reuse it to resume (default reports/<today>)")
+    parser.add_argument("--days", type=int, default=30, help="Spending window in days")
+    parser.add_argument("--partition-size", type=int, default=FLEET_REPORT_PARTITION_SIZE, help="User IDs per partition")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or Path("reports") / datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    report = run_report(output_dir, args.days, args.partition_size, args.workers)
+    print(f"Report for {report['users']['total']} users written to {output_dir / 'report.json'}")
@@ -0,0 +1,158 @@
+import calendar
+import os
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from home_budget.app.crud import AnalyticsCRUD, CategoryCRUD, ChangeFeedCRUD
+from home_budget.app.money import CENTS_PER_UNIT
+from home_budget.app.versioned_cache import VersionedCache
+
+# How much spending history the forecast model reads
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "730"))
+# How many users' forecasts are kept in memory
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "1024"))
+
+
+def _month_days(year: int, month: int) -> int:
+    return calendar.monthrange(year, month)[1]
+
+
+def _weekday_counts(first: date, days: int) -> np.ndarray:
+    """How many times each weekday (Monday = 0) occurs in `days` days starting at first"""
+    if days <= 0:
+        return np.zeros(7)
+    return np.bincount((first.weekday() + np.arange(days)) % 7, minlength=7).astype(float)
+
+
+class SpendingForecast:
+    """Per-category spending forecast from daily history, cached per user data version.
+
+    Each category's daily spending is smoothed exponentially, weighted by how that
+    category's spending usually falls across the week, and summed over the days left.
+    The user's change-feed high-water mark is the data version: any expense write
+    moves it, so a cached forecast is reused until the user's expenses change.
+    """
+
+    # (user_id, alpha) -> forecast, by (data version, day computed)
+    _cache = VersionedCache(FORECAST_CACHE_SIZE)
+
+    @staticmethod
+    def model(
+        day_index: np.ndarray,
+        category_index: np.ndarray,
+        amounts: np.ndarray,
+        categories: int,
+        first_day: date,
+        today: date,
+        alpha: float
+    ) -> Dict[str, np.ndarray]:
+        """Fit the model on (day, category, amount) aggregates and project this and next month per category"""
+        days = (today - first_day).days + 1
+        series = np.zeros((categories, days))
+        np.add.at(series, (category_index, day_index), amounts)
+
+        # Exponential smoothing in closed form: the level is a weighted sum of the series with
+        # weights alpha * (1 - alpha)^age, the oldest day carrying the remaining weight
+        ages = np.arange(days - 1, -1, -1)
+        weights = alpha * (1 - alpha) ** ages
+        weights[0] = (1 - alpha) ** (days - 1)
+        level = series @ weights
+
+        # Weekday profile: each weekday's average spending relative to the overall daily average
+        weekday_onehot = np.zeros((days, 7))
+        weekday_onehot[np.arange(days), (first_day.weekday() + np.arange(days)) % 7] = 1
+        weekday_seen = weekday_onehot.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weekday_mean = (series @ weekday_onehot) / weekday_seen
+            profile = weekday_mean / series.mean(axis=1, keepdims=True)
+        profile = np.where(np.isfinite(profile), profile, 1.0)
+
+        # Spending expected on the rest of this month (after today) and all of next month
+        month_start = today.replace(day=1)
+        days_in_month = _month_days(today.year, today.month)
+        next_month_start = month_start + timedelta(days=days_in_month)
+        days_in_next_month = _month_days(next_month_start.year, next_month_start.month)
+        rest_of_month = _weekday_counts(today + timedelta(days=1), days_in_month - today.day)
+        next_month = _weekday_counts(next_month_start, days_in_next_month)
+
+        spent_to_date = series[:, max(0, (month_start - first_day).days):].sum(axis=1)
+        return {
+            "average_daily_spending": level,
+            "spent_to_date": spent_to_date,
+            "projected_month_end": spent_to_date + level * (profile @ rest_of_month),
+            "projected_next_month": level * (profile @ next_month),
+        }
+
+    @staticmethod
+    def compute(db: Session, user_id: int, today: date, alpha: float) -> Dict[str, Any]:
+        """Forecast a user's spending from their daily per-category history"""
+        history_start = today - timedelta(days=FORECAST_HISTORY_DAYS - 1)
+        rows = AnalyticsCRUD.get_daily_category_totals(
+            db, user_id, datetime.combine(history_start, datetime.min.time())
+        )
+        rows = [row for row in rows if row[0] <= today]
+        if not rows:
+            return {"history_days": 0, "categories": {}}
+
+        expense_days, category_ids, amounts = zip(*rows)
+        first_day = min(expense_days)
+        ordinals = np.fromiter((day.toordinal() for day in expense_days), dtype=np.int64, count=len(rows))
+        known_categories, category_index = np.unique(np.array(category_ids), return_inverse=True)
+
+        projection = SpendingForecast.model(
+            ordinals - first_day.toordinal(),
+            category_index,
+            np.array(amounts, dtype=float) / CENTS_PER_UNIT,
+            len(known_categories),
+            first_day,
+            today,
+            alpha
+        )
+        return {
+            "history_days": (today - first_day).days + 1,
+            "categories": {
+                int(category_id): {name: float(values[i]) for name, values in projection.items()}
+                for i, category_id in enumerate(known_categories)
+            },
+        }
+
+    @staticmethod
+    def for_user(db: Session, user_id: int, alpha: float) -> Dict[str, Any]:
+        """Get a user's forecast, recomputing only when their expenses changed or the day rolled over"""
+        version = ChangeFeedCRUD.get_high_water_mark(db, user_id)
+        today = datetime.now(timezone.utc).date()
+        forecast, cache_hit = SpendingForecast._cache.get_or_compute(
+            (user_id, alpha), (version, today), lambda: SpendingForecast.compute(db, user_id, today, alpha)
+        )
+
+        # Category names are looked up per request so renames show up without recomputing
+        names = {category.id: category.name for category in CategoryCRUD.get_all(db)}
+        categories: List[Dict[str, Any]] = [
+            {
+                "category_id": category_id,
+                "category_name": names.get(category_id),
+                **{name: round(value, 2) for name, value in values.items()},
+            }
+            for category_id, values in forecast["categories"].items()
+        ]
+        categories.sort(key=lambda category: category["projected_month_end"], reverse=True)
+
+        next_month_start = today.replace(day=1) + timedelta(days=_month_days(today.year, today.month))
+        return {
+            "as_of": today.isoformat(),
+            "month": today.strftime("%Y-%m"),
+            "next_month": next_month_start.strftime("%Y-%m"),
+            "alpha": alpha,
+            "history_days": forecast["history_days"],
+            "data_version": version,
+            "cached": cache_hit,
+            **{
+                name: round(sum((values[name] for values in forecast["categories"].values()), 0.0), 2)
+                for name in ("spent_to_date", "projected_month_end", "projected_next_month")
+            },
+            "categories": categories,
+        }
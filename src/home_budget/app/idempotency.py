@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import os
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+import orjson
+from fastapi import Header, HTTPException, Request, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from home_budget.app.crud import IdempotencyCRUD
+from home_budget.app.models import User
+from home_budget.app.serialization import encoded_response
+from home_budget.app.sharding import for_each_shard
+
+# How long a stored response is replayed for its key
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+# How often expired keys are deleted
+IDEMPOTENCY_SWEEP_SECONDS = float(os.getenv("IDEMPOTENCY_SWEEP_SECONDS", "3600"))
+
+
+class IdempotentRequest:
+    """A write request and its optional Idempotency-Key.
+
+    Keyed requests store their response in the same transaction as the write, so a
+    retry with the same key and body gets the stored response without the write
+    running again. Without a key every method simply passes through.
+    """
+
+    def __init__(self, key: Optional[str], request_hash: str):
+        self.key = key
+        self.request_hash = request_hash
+
+    def replay(self, db: Session, user: User) -> Optional[Response]:
+        """The stored response for this key, or None if the request has to run"""
+        if self.key is None:
+            return None
+
+        record = IdempotencyCRUD.get(db, user.id, self.key)
+        if record is None:
+            return None
+        if record.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None):
+            # Free the key before the write starts, so a rollback of the write cannot restore it
+            db.delete(record)
+            db.commit()
+            return None
+        if record.request_hash != self.request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+        response = encoded_response(orjson.loads(record.response_body), record.status_code)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    def commit(self, db: Session, user: User, content: Any, status_code: int = 200) -> Response:
+        """Store the response under the key (if any), commit the write with it and return the response"""
+        if self.key is not None:
+            IdempotencyCRUD.save(
+                db, user.id, self.key, self.request_hash, status_code, orjson.dumps(content),
+                datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+            )
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key committed first; answer with its response
+            db.rollback()
+            replayed = self.replay(db, user) if self.key is not None else None
+            if replayed is None:
+                raise
+            return replayed
+        return encoded_response(content, status_code)
+
+
+async def idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(
+        None, max_length=255, description="Client-chosen key that makes retries of this write safe"
+    )
+) -> IdempotentRequest:
+    """Dependency hashing the method, path and JSON body a key is bound to"""
+    body = await request.body()
+    if body:
+        try:
+            # Canonical form, so retries that re-serialize the same body still match
+            body = orjson.dumps(orjson.loads(body), option=orjson.OPT_SORT_KEYS)
+        except orjson.JSONDecodeError:
+            pass
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode() + body).hexdigest()
+    return IdempotentRequest(idempotency_key, digest)
+
+
+def sweep_expired_keys():
+    """Delete expired idempotency keys on every shard"""
+    for_each_shard(IdempotencyCRUD.delete_expired)
+
+
+async def run_sweeper(interval: float = IDEMPOTENCY_SWEEP_SECONDS):
+    """Sweep expired keys every interval seconds until cancelled"""
+    while True:
+        try:
+            await asyncio.to_thread(sweep_expired_keys)
+        except Exception as e:
+            print(f"Error sweeping idempotency keys: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,30 @@
+import sys
+
+from typing import Dict, List
+
+from home_budget.app.database import session_factories
+from home_budget.app.crud import LedgerCRUD
+from home_budget.app.sharding import create_all_tables
+
+
+def check_balances() -> List[Dict]:
+    """Replay the balance ledger on every shard and return the users whose balance disagrees with it"""
+    create_all_tables()
+    problems = []
+    
+    for shard, session_factory in enumerate(session_factories):
+        db = session_factory()
+        try:
+            LedgerCRUD.backfill_opening_entries(db)
+            shard_problems = LedgerCRUD.check_consistency(db)
+            print(f"Shard {shard}: {len(shard_problems)} ledger inconsistencies")
+            for problem in shard_problems:
+                print(f"  {problem}")
+            problems.extend(shard_problems)
+        finally:
+            db.close()
+    
+    return problems
+
+if __name__ == "__main__":
+    sys.exit(1 if check_balances() else 0)
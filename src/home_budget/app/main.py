@@ -1,26 +1,81 @@
+import asyncio
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from home_budget.app.database import engine, Base
-from home_budget.app.routers import categories, auth, expenses, analytics
+from home_budget.app.routers import categories, auth, expenses, analytics, batch, budgets, balance, recurring
 from home_budget.app.init_categories import create_predefined_categories
+from home_budget.app.sharding import init_shards, create_all_tables, for_each_shard
+from home_budget.app.crud import BudgetCRUD, LedgerCRUD
+from home_budget.app.replication import refresh_replicas
+from home_budget.app.admission import AdmissionControlMiddleware, admission_metrics
+from home_budget.app.negotiation import ContentNegotiationMiddleware, CompressionMiddleware
+from home_budget.app.idempotency import run_sweeper
+from home_budget.app.analytics_cache import AnalyticsCache, AnalyticsWarmup, run_warmup
+from home_budget.app.recurring import run_scheduler
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables on every shard
+create_all_tables()
 
-# Create predefined categories
+# Create predefined categories, then set up the user directory and copy categories to the shards
 create_predefined_categories()
+init_shards()
+
+# Build the running month-to-date budget totals on first start
+for_each_shard(BudgetCRUD.backfill_month_totals)
+# Give users created before the balance ledger their opening entry
+for_each_shard(LedgerCRUD.backfill_opening_entries)
+
+# Seed the read replicas (kept fresh by "python -m home_budget.app.replication")
+refresh_replicas()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background maintenance tasks while the app is up"""
+    tasks = [
+        asyncio.create_task(run_sweeper()),
+        asyncio.create_task(run_warmup()),
+        asyncio.create_task(run_scheduler())
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+
 
 app = FastAPI(
     title="Home Budget API",
     description="A simple REST API for managing personal budgets",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
+# Middleware added last runs first: admission control, then compression of the final
+# bytes, then MessagePack encoding for clients that ask for it
+app.add_middleware(ContentNegotiationMiddleware)
+app.add_middleware(CompressionMiddleware)
+# Shed load per route class before requests pile up in the threadpool
+app.add_middleware(AdmissionControlMiddleware)
+
 # Include routers
 app.include_router(categories.router)
 app.include_router(auth.router)
 app.include_router(expenses.router)
 app.include_router(analytics.router)
+app.include_router(batch.router)
+app.include_router(budgets.router)
+app.include_router(balance.router)
+app.include_router(recurring.router)
 
 @app.get("/")
 def read_root():
     return {"message": "Home Budget API is running"}
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Admission control state and counters per route class, and analytics cache and warm-up counters"""
+    return {
+        "admission": admission_metrics(),
+        "analytics_cache": AnalyticsCache.metrics(),
+        "analytics_warmup": AnalyticsWarmup.metrics()
+    }
@@ -0,0 +1,98 @@
+from typing import List, Tuple
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
+
+from home_budget.app.money import to_cents
+
+# Rows converted per UPDATE batch
+MIGRATION_BATCH_SIZE = 10_000
+
+# (table, old REAL column, new INTEGER cents column) for every money column
+CENTS_COLUMNS: List[Tuple[str, str, str]] = [
+    ("users", "balance", "balance_cents"),
+    ("expenses", "amount", "amount_cents"),
+    ("archived_expenses", "amount", "amount_cents"),
+    ("archive_rollups", "total_spent", "total_spent_cents"),
+    ("budgets", "monthly_limit", "monthly_limit_cents"),
+    ("monthly_category_totals", "total_spent", "total_spent_cents"),
+    ("balance_ledger", "amount", "amount_cents"),
+    ("balance_snapshots", "balance", "balance_cents"),
+]
+
+
+def migrate_money_to_cents(engine: Engine) -> int:
+    """Convert money columns stored as floats to integer cents, in place.
+
+    Each table still holding an old column gets its cents column, filled with the
+    rounded value, and loses the old column, all in one transaction. Tables that
+    are already converted are skipped. Returns the number of columns converted.
+    """
+    converted = 0
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        for table, old, new in CENTS_COLUMNS:
+            if table not in tables:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table)}
+            if old not in columns:
+                continue
+            if new not in columns:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {new} INTEGER NOT NULL DEFAULT 0"))
+            # Rounded in Python with to_cents, so migrated amounts round half up like new ones;
+            # SQLite's ROUND works on the float product, which turns 0.285 into 28 cents
+            rows = connection.execute(text(f"SELECT rowid, {old} FROM {table}")).all()
+            for start in range(0, len(rows), MIGRATION_BATCH_SIZE):
+                connection.execute(
+                    text(f"UPDATE {table} SET {new} = :cents WHERE rowid = :rowid"),
+                    [
+                        {"rowid": rowid, "cents": to_cents(value or 0)}
+                        for rowid, value in rows[start:start + MIGRATION_BATCH_SIZE]
+                    ]
+                )
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN {old}"))
+            converted += 1
+    return converted
+
+
+def migrate_expense_ids_autoincrement(engine: Engine, expenses: Table, archived: Table) -> bool:
+    """Rebuild an expenses table created without AUTOINCREMENT so expense IDs are never reused.
+
+    Without AUTOINCREMENT SQLite hands out the highest free ID again, so archiving or
+    deleting the newest expenses let new ones take their IDs. The table is rebuilt
+    with its rows and the ID sequence is started after the highest hot or archived ID,
+    in one transaction. Returns False if there was nothing to migrate.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as connection:
+        sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": expenses.name}
+        ).scalar()
+        if sql is None or "AUTOINCREMENT" in sql.upper():
+            return False
+
+        # Same DDL as a fresh table, under a temporary name; the indexes go with the old
+        # table and are created again by the caller
+        rebuilt = f"{expenses.name}_rebuild"
+        ddl = str(CreateTable(expenses).compile(connection)).replace(
+            f"CREATE TABLE {expenses.name} (", f"CREATE TABLE {rebuilt} (", 1
+        )
+        columns = ", ".join(column.name for column in expenses.columns)
+        connection.execute(text(ddl))
+        connection.execute(text(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {expenses.name}"))
+        connection.execute(text(f"DROP TABLE {expenses.name}"))
+        connection.execute(text(f"ALTER TABLE {rebuilt} RENAME TO {expenses.name}"))
+
+        highest = connection.execute(text(
+            f"SELECT MAX(COALESCE((SELECT MAX(id) FROM {expenses.name}), 0), "
+            f"COALESCE((SELECT MAX(id) FROM {archived.name}), 0))"
+        )).scalar()
+        connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": expenses.name})
+        connection.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+            {"name": expenses.name, "seq": highest}
+        )
+    return True
@@ -2,9 +2,11 @@ from sqlalchemy import (
     Column, 
     Integer, 
     String,
-    Float, 
     ForeignKey, 
-    DateTime
+    DateTime,
+    LargeBinary,
+    UniqueConstraint,
+    Index
 )
 from sqlalchemy.orm import relationship
 from home_budget.app.database import Base
@@ -17,7 +19,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    balance = Column(Float, default=1000.0)  # Default balance for new users
+    balance_cents = Column(Integer, nullable=False, default=100000)  # Default balance for new users ($1000.00)
 
     # A user can have multiple expenses
     # Each expense has a single owner    
@@ -31,15 +33,176 @@ class Category(Base):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Per-user date range scans, and user ID range scans for the fleet report
+        Index("ix_expenses_owner_date", "owner_id", "date"),
+        # Never reuse the IDs of deleted or archived expenses
+        {"sqlite_autoincrement": True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount_cents = Column(Integer, nullable=False)
     description = Column(String, nullable=True)
-    date = Column(DateTime, default=datetime.now(timezone.utc))
+    date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     owner_id = Column(Integer, ForeignKey("users.id"))
     category_id = Column(Integer, ForeignKey("categories.id"))
     
     # This is where we define the owner relationship
     owner = relationship("User", back_populates="expenses")
-    category = relationship("Category")
\ No newline at end of file
+    category = relationship("Category")
+
+class ExpenseChange(Base):
+    __tablename__ = "expense_changes"
+    __table_args__ = (
+        # Per-user change sequence, also serves "changes since" range scans
+        UniqueConstraint("owner_id", "seq", name="uq_expense_changes_owner_seq"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    expense_id = Column(Integer, nullable=False)  # No FK, the expense may be deleted
+    operation = Column(String, nullable=False)  # "create", "update" or "delete"
+    changed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class ArchivedExpense(Base):
+    """Cold storage for expenses older than the archive cutoff (same columns as Expense)"""
+    __tablename__ = "archived_expenses"
+    
+    id = Column(Integer, primary_key=True)  # Keeps the original expense ID
+    amount_cents = Column(Integer, nullable=False)
+    description = Column(String, nullable=True)
+    date = Column(DateTime, index=True)
+    
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    
+    category = relationship("Category")
+
+
+class ArchiveRollup(Base):
+    """Monthly per-category totals of archived expenses"""
+    __tablename__ = "archive_rollups"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "category_id", "month", name="uq_archive_rollups_owner_category_month"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    month = Column(String, nullable=False)  # "YYYY-MM"
+    total_spent_cents = Column(Integer, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+
+class ArchiveState(Base):
+    """Single row holding the archive watermark: every expense dated before it is archived"""
+    __tablename__ = "archive_state"
+    
+    id = Column(Integer, primary_key=True)
+    archived_before = Column(DateTime, nullable=True)
+
+
+class UserShard(Base):
+    """User directory: which shard holds each user (only used on shard 0)"""
+    __tablename__ = "user_shards"
+    
+    id = Column(Integer, primary_key=True, index=True)  # Global user ID
+    email = Column(String, unique=True, index=True, nullable=False)
+    shard = Column(Integer, nullable=False, default=0)
+
+
+class Budget(Base):
+    """Monthly spending limit a user sets for a category"""
+    __tablename__ = "budgets"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "category_id", name="uq_budgets_owner_category"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    monthly_limit_cents = Column(Integer, nullable=False)
+
+
+class MonthlyCategoryTotal(Base):
+    """Running month-to-date spending per user, category and month, kept by the expense write paths"""
+    __tablename__ = "monthly_category_totals"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "category_id", "month", name="uq_monthly_totals_owner_category_month"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    month = Column(String, nullable=False)  # "YYYY-MM"
+    total_spent_cents = Column(Integer, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+
+class BalanceEntry(Base):
+    """Append-only ledger of balance adjustments, numbered per user"""
+    __tablename__ = "balance_ledger"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "seq", name="uq_balance_ledger_owner_seq"),
+        Index("ix_balance_ledger_owner_created_at", "owner_id", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    amount_cents = Column(Integer, nullable=False)  # Signed: negative for money spent
+    reason = Column(String, nullable=False)  # "opening", "expense_create", "expense_update" or "expense_delete"
+    expense_id = Column(Integer, nullable=True)  # Not a foreign key, deleted expenses keep their entries
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class BalanceSnapshot(Base):
+    """Checkpoint of a user's balance after a ledger entry, so point-in-time queries replay only a few entries"""
+    __tablename__ = "balance_snapshots"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "seq", name="uq_balance_snapshots_owner_seq"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    seq = Column(Integer, nullable=False)  # Ledger entry the snapshot was taken after
+    balance_cents = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, nullable=False)  # created_at of that ledger entry
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of an expense write sent with an Idempotency-Key header"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "key", name="uq_idempotency_keys_owner_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)  # SHA-256 of method, path and canonical JSON body
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(LargeBinary, nullable=False)  # orjson-encoded response content
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class RecurringExpense(Base):
+    """Rule that materializes an expense on a schedule (rent, subscriptions, utilities)"""
+    __tablename__ = "recurring_expenses"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    amount_cents = Column(Integer, nullable=False)
+    description = Column(String, nullable=False)
+    frequency = Column(String, nullable=False)  # "daily", "weekly", "monthly" or "custom"
+    interval_days = Column(Integer, nullable=True)  # Days between occurrences of a "custom" rule
+    start_date = Column(DateTime, nullable=False)  # First occurrence, anchors the later ones
+    end_date = Column(DateTime, nullable=True)  # No occurrences after it
+    occurrences = Column(Integer, nullable=False, default=0)  # Occurrences handled so far, materialized or skipped
+    skipped_occurrences = Column(Integer, nullable=False, default=0)  # Occurrences the balance could not cover
+    next_run_at = Column(DateTime, nullable=True, index=True)  # Next occurrence, NULL once the rule has ended
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
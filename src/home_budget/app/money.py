@@ -0,0 +1,14 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+# Money is stored as integer cents; these convert at the API edge
+CENTS_PER_UNIT = 100
+
+
+def to_cents(amount: float) -> int:
+    """Convert an amount in currency units to integer cents, rounding half up"""
+    return int((Decimal(str(amount)) * CENTS_PER_UNIT).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    """Convert integer cents to an amount in currency units"""
+    return cents / CENTS_PER_UNIT
@@ -0,0 +1,250 @@
+import os
+import zlib
+
+from typing import Dict, List, Optional, Tuple
+
+import brotli
+import orjson
+
+from home_budget.app.serialization import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    msgpack_dumps,
+    negotiated_media_type
+)
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Brotli quality 0-11; low qualities compress dynamic responses fast and still beat gzip
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+COMPRESSIBLE_MEDIA_TYPES = {JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE}
+
+
+def _parse_quality_list(header: str) -> Dict[str, float]:
+    """Parse an Accept or Accept-Encoding header into {value: q}"""
+    qualities = {}
+    for item in header.split(","):
+        value, *params = [part.strip() for part in item.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        qualities[value.lower()] = max(q, qualities.get(value.lower(), 0.0))
+    return qualities
+
+
+def negotiate_media_type(accept: str) -> str:
+    """MessagePack when the client asks for it at least as strongly as for JSON, else JSON"""
+    qualities = _parse_quality_list(accept)
+    msgpack_q = max((qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+    json_q = max(qualities.get(JSON_MEDIA_TYPE, 0.0), qualities.get("application/*", 0.0), qualities.get("*/*", 0.0))
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else JSON_MEDIA_TYPE
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding the client accepts, brotli first on a tie"""
+    qualities = _parse_quality_list(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ("br", "gzip"):
+        q = qualities.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _with_headers(headers: List[Tuple[bytes, bytes]], drop: set, add: List[Tuple[bytes, bytes]]):
+    return [(key, value) for key, value in headers if key.lower() not in drop] + add
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]], field: str) -> List[Tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    value = f"{vary}, {field}" if vary else field
+    return _with_headers(headers, {b"vary"}, [(b"vary", value.encode("latin-1"))])
+
+
+class ContentNegotiationMiddleware:
+    """Serves MessagePack instead of JSON to clients whose Accept header asks for it.
+
+    Routes that encode their own payloads read the negotiated type through
+    encoded_response; any other JSON response is transcoded here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        media_type = negotiate_media_type(headers.get(b"accept", b"").decode("latin-1"))
+        token = negotiated_media_type.set(media_type)
+        try:
+            if media_type == JSON_MEDIA_TYPE:
+                await self.app(scope, receive, _VaryAcceptSender(send))
+            else:
+                await self.app(scope, receive, _MessagePackSender(send))
+        finally:
+            negotiated_media_type.reset(token)
+
+
+class _VaryAcceptSender:
+    """Marks a response left as JSON as depending on Accept, so caches keep it apart from MessagePack"""
+
+    def __init__(self, send):
+        self.send = send
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            message["headers"] = _add_vary(message["headers"], "Accept")
+        await self.send(message)
+
+
+class _MessagePackSender:
+    """Buffers a JSON response and sends it re-encoded as MessagePack"""
+
+    def __init__(self, send):
+        self.send = send
+        self.start = None
+        self.transcode = False
+        self.body = []
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            content_type = _header(message["headers"], b"content-type") or ""
+            self.transcode = content_type.split(";")[0].strip() == JSON_MEDIA_TYPE
+            if not self.transcode:
+                message["headers"] = _add_vary(message["headers"], "Accept")
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or not self.transcode:
+            await self.send(message)
+            return
+
+        self.body.append(message.get("body", b""))
+        if message.get("more_body", False):
+            return
+
+        raw = b"".join(self.body)
+        body = msgpack_dumps(orjson.loads(raw)) if raw else raw
+        self.start["headers"] = _add_vary(_with_headers(
+            self.start["headers"],
+            {b"content-type", b"content-length"},
+            [(b"content-type", MSGPACK_MEDIA_TYPE.encode()), (b"content-length", str(len(body)).encode())]
+        ), "Accept")
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware:
+    """Compresses JSON and MessagePack responses with brotli or gzip, as negotiated.
+
+    Complete bodies below COMPRESSION_MIN_SIZE are sent as they are. Streamed bodies
+    are compressed chunk by chunk, flushing after each so the client can decode them
+    as they arrive.
+    """
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.min_size))
+
+
+class _CompressingSender:
+    def __init__(self, send, encoding: str, min_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.min_size = min_size
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _compressible(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        if _header(headers, b"content-encoding"):
+            return False
+        content_type = (_header(headers, b"content-type") or "").split(";")[0].strip()
+        return content_type in COMPRESSIBLE_MEDIA_TYPES or content_type.startswith("text/")
+
+    def _new_compressor(self):
+        if self.encoding == "br":
+            return brotli.Compressor(quality=BROTLI_QUALITY)
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def _compress(self, chunk: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            data = self.compressor.process(chunk)
+            return data + (self.compressor.finish() if last else self.compressor.flush())
+        data = self.compressor.compress(chunk)
+        return data + self.compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = not self._compressible(message["headers"])
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.min_size:
+                # Small complete response, not worth compressing
+                self.start["headers"] = _add_vary(self.start["headers"], "Accept-Encoding")
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            # Length is unknown until the last chunk of a stream, so only complete bodies keep it
+            self.compressor = self._new_compressor()
+            compressed = self._compress(body, last=not more_body)
+            added = [(b"content-encoding", self.encoding.encode())]
+            if not more_body:
+                added.append((b"content-length", str(len(compressed)).encode()))
+            self.start["headers"] = _add_vary(
+                _with_headers(self.start["headers"], {b"content-length"}, added), "Accept-Encoding"
+            )
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        await self.send({
+            "type": "http.response.body",
+            "body": self._compress(body, last=not more_body),
+            "more_body": more_body
+        })
@@ -0,0 +1,130 @@
+import asyncio
+import calendar
+import os
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from home_budget.app.crud import RecurringCRUD
+from home_budget.app.models import User, RecurringExpense
+from home_budget.app.sharding import create_all_tables, for_each_shard
+
+# How often due recurring expenses are materialized
+RECURRING_TICK_SECONDS = float(os.getenv("RECURRING_TICK_SECONDS", "60"))
+# Rules handled per transaction
+RECURRING_BATCH_SIZE = int(os.getenv("RECURRING_BATCH_SIZE", "500"))
+# Occurrences one rule may catch up per transaction; the rest follow in the next batch
+RECURRING_MAX_CATCH_UP = int(os.getenv("RECURRING_MAX_CATCH_UP", "400"))
+
+FREQUENCY_DAYS = {"daily": 1, "weekly": 7}
+
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    """Same day and time `months` later, clamped to the end of shorter months"""
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+
+
+class RecurringEngine:
+    """Turns due recurring expense rules into expenses, many rules per transaction.
+
+    A rule's occurrences are numbered from its start date and each one is handled
+    exactly once: the rule is advanced past them with a conditional update in the
+    same transaction as their expenses. After downtime the missed occurrences are
+    caught up with their scheduled dates, and a restarted or concurrent scheduler
+    cannot repeat them. An occurrence the user's balance cannot cover is skipped and
+    counted on the rule, as a manual expense over the balance would be rejected.
+    """
+
+    @staticmethod
+    def occurrence_at(rule: RecurringExpense, index: int) -> datetime:
+        """Date of a rule's occurrence number `index` (0 is the start date)"""
+        if rule.frequency == "monthly":
+            return _add_months(rule.start_date, index)
+        days = rule.interval_days if rule.frequency == "custom" else FREQUENCY_DAYS[rule.frequency]
+        return rule.start_date + timedelta(days=days * index)
+
+    @staticmethod
+    def plan(
+        rule: RecurringExpense, now: datetime, balance: int
+    ) -> Tuple[List[datetime], int, int, Optional[datetime]]:
+        """Occurrences of a rule due by now that the balance covers.
+
+        Returns (dates to materialize, occurrences handled, skipped, next run or None once ended).
+        """
+        dates: List[datetime] = []
+        index, skipped = rule.occurrences, 0
+        moment = rule.next_run_at
+        while moment <= now and index - rule.occurrences < RECURRING_MAX_CATCH_UP:
+            if rule.end_date is not None and moment > rule.end_date:
+                break
+            if balance >= rule.amount_cents:
+                balance -= rule.amount_cents
+                dates.append(moment)
+            else:
+                skipped += 1
+            index += 1
+            moment = RecurringEngine.occurrence_at(rule, index)
+        if rule.end_date is not None and moment > rule.end_date:
+            moment = None
+        return dates, index, skipped, moment
+
+    @staticmethod
+    def materialize_due(db: Session, now: datetime) -> int:
+        """Materialize one batch of due rules in one transaction and return how many rules it handled"""
+        rules = RecurringCRUD.get_due(db, now, RECURRING_BATCH_SIZE)
+        if not rules:
+            return 0
+        balances: Dict[int, int] = dict(
+            db.query(User.id, User.balance_cents).filter(User.id.in_({rule.owner_id for rule in rules})).all()
+        )
+
+        available = dict(balances)
+        occurrences: List[Tuple[RecurringExpense, datetime]] = []
+        for rule in rules:
+            dates, handled, skipped, next_run_at = RecurringEngine.plan(rule, now, available[rule.owner_id])
+            if not RecurringCRUD.advance(db, rule, handled, skipped, next_run_at):
+                continue  # Another scheduler handled this rule first
+            available[rule.owner_id] -= rule.amount_cents * len(dates)
+            occurrences.extend((rule, moment) for moment in dates)
+
+        RecurringCRUD.materialize(
+            db, occurrences, {user_id: balances[user_id] for user_id in {rule.owner_id for rule, _ in occurrences}}
+        )
+        db.commit()
+        return len(rules)
+
+    @staticmethod
+    def run_due(db: Session) -> int:
+        """Materialize every rule due now, batch by batch"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        handled = 0
+        while True:
+            batch = RecurringEngine.materialize_due(db, now)
+            handled += batch
+            if batch < RECURRING_BATCH_SIZE:
+                return handled
+
+
+def run_tick():
+    """Materialize the due recurring expenses on every shard"""
+    for_each_shard(RecurringEngine.run_due)
+
+
+async def run_scheduler(interval: float = RECURRING_TICK_SECONDS):
+    """Run a tick every interval seconds until cancelled, starting with a catch-up"""
+    while True:
+        try:
+            await asyncio.to_thread(run_tick)
+        except Exception as e:
+            print(f"Error materializing recurring expenses: {e}")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    create_all_tables()
+    run_tick()
+    print("Materialized the due recurring expenses")
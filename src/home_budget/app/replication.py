@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+from itertools import count
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from home_budget.app.database import engines, session_factories, replica_engines, replica_session_factories
+
+# "round_robin" or "least_loaded"
+REPLICA_SELECTION = os.getenv("REPLICA_SELECTION", "round_robin")
+# How long a user's reads stay on the primary after they write, so they read their own writes
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+# How often the local SQLite replicas are refreshed from their primary
+REPLICA_REFRESH_SECONDS = float(os.getenv("REPLICA_REFRESH_SECONDS", "5"))
+# Read-your-writes key of the shared reference data (categories) on shard 0; no user has ID 0
+SHARED_DATA_KEY = 0
+
+
+class ReplicaRouter:
+    """Routes read sessions to replicas and write sessions to the shard primaries"""
+
+    _lock = threading.Lock()
+    _round_robin = [count() for _ in engines]
+    # Open sessions per shard per replica, for least-loaded selection
+    _active: List[List[int]] = [[0] * len(shard_replicas) for shard_replicas in replica_engines]
+    # Monotonic time of each user's last committed write
+    _last_write: Dict[int, float] = {}
+
+    @staticmethod
+    def note_write(user_id: int):
+        """Pin a user's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+        ReplicaRouter._last_write[user_id] = time.monotonic()
+
+    @staticmethod
+    def recently_wrote(user_id: int) -> bool:
+        """Check whether a user is still inside their read-your-writes window"""
+        last_write = ReplicaRouter._last_write.get(user_id)
+        if last_write is None:
+            return False
+        if time.monotonic() - last_write > READ_YOUR_WRITES_SECONDS:
+            ReplicaRouter._last_write.pop(user_id, None)
+            return False
+        return True
+
+    @staticmethod
+    def write_session(shard: int, user_id: Optional[int] = None) -> Session:
+        """Session on a shard primary; commits pin the user to the primary for a while"""
+        db = session_factories[shard]()
+        db.info["user_id"] = user_id
+        return db
+
+    @staticmethod
+    def _pick_replica(shard: int) -> int:
+        """Pick a replica of the shard by the configured selection policy"""
+        if REPLICA_SELECTION == "least_loaded":
+            active = ReplicaRouter._active[shard]
+            return active.index(min(active))
+        return next(ReplicaRouter._round_robin[shard]) % len(replica_engines[shard])
+
+    @staticmethod
+    def read_session(shard: int, user_id: Optional[int] = None) -> Session:
+        """Session for reads: a replica unless the shard has none or the user just wrote"""
+        if not replica_engines[shard]:
+            return session_factories[shard]()
+        if user_id is not None and ReplicaRouter.recently_wrote(user_id):
+            return session_factories[shard]()
+
+        with ReplicaRouter._lock:
+            replica = ReplicaRouter._pick_replica(shard)
+            ReplicaRouter._active[shard][replica] += 1
+        db = replica_session_factories[shard][replica]()
+        db.info["replica"] = (shard, replica)
+        return db
+
+    @staticmethod
+    def release(db: Session):
+        """Close a session from read_session or write_session"""
+        replica = db.info.get("replica")
+        db.close()
+        if replica is not None:
+            shard, index = replica
+            with ReplicaRouter._lock:
+                ReplicaRouter._active[shard][index] -= 1
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer_to_primary(session: Session):
+    """Start the read-your-writes window of the user who committed"""
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        ReplicaRouter.note_write(user_id)
+
+
+def refresh_replicas():
+    """Copy every SQLite shard primary onto its replicas with the SQLite backup API"""
+    for shard_engine, shard_replicas in zip(engines, replica_engines):
+        if not shard_replicas:
+            continue
+        source = shard_engine.raw_connection()
+        try:
+            for replica_engine in shard_replicas:
+                target = replica_engine.raw_connection()
+                try:
+                    source.driver_connection.backup(target.driver_connection)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+
+
+def run_refresh_loop(interval: float = REPLICA_REFRESH_SECONDS):
+    """Refresh the replicas every interval seconds, forever"""
+    while True:
+        refresh_replicas()
+        time.sleep(interval)
+
+if __name__ == "__main__":
+    print(f"Refreshing replicas every {REPLICA_REFRESH_SECONDS} seconds")
+    run_refresh_loop()
@@ -3,10 +3,12 @@ from sqlalchemy.orm import Session
 from typing import Dict, List
 from enum import Enum
 
-from home_budget.app.database import get_db
-from home_budget.app.dependencies import get_current_user_dependency
+from home_budget.app.dependencies import get_current_user_read_dependency, get_user_read_db
 from home_budget.app.models import User
-from home_budget.app.crud import AnalyticsCRUD
+from home_budget.app.crud import CategoryCRUD
+from home_budget.app.analytics_cache import AnalyticsCache
+from home_budget.app.forecast import SpendingForecast
+from home_budget.app.money import from_cents
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -22,29 +24,34 @@ class TimePeriod(str, Enum):
 @router.get("/spending/total")
 def get_total_spending(
     period: TimePeriod = Query(TimePeriod.ALL_TIME, description="Time period for analysis"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
 ):
     """Get total spending for a specific time period"""
-    start_date = AnalyticsCRUD.get_date_range_start(period.value)
-    spending_data = AnalyticsCRUD.get_total_spending(db, current_user.id, start_date)
+    spending_data = AnalyticsCache.get(db, current_user.id, "total", period.value)
     
     return {
         "period": period.value,
         **spending_data,
-        "remaining_balance": round(current_user.balance, 2)
+        "remaining_balance": from_cents(current_user.balance_cents)
     }
 
 
 @router.get("/spending/by-category")
 def get_spending_by_category(
     period: TimePeriod = Query(TimePeriod.ALL_TIME, description="Time period for analysis"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
 ):
     """Get spending breakdown by category for a specific time period"""
-    start_date = AnalyticsCRUD.get_date_range_start(period.value)
-    categories = AnalyticsCRUD.get_spending_by_category(db, current_user.id, start_date)
+    categories = AnalyticsCache.get(db, current_user.id, "by_category", period.value)
+    
+    # Category names are looked up per request so renames show up in cached results
+    names = {category.id: category.name for category in CategoryCRUD.get_all(db)}
+    categories = [
+        {**category, "category_name": names.get(category["category_id"], category["category_name"])}
+        for category in categories
+    ]
     
     total_spent = sum(cat["total_spent"] for cat in categories)
     
@@ -58,11 +65,11 @@ def get_spending_by_category(
 @router.get("/spending/daily")
 def get_daily_spending(
     days: int = Query(30, description="Number of days to analyze", ge=1, le=365),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
 ):
     """Get daily spending breakdown for the last N days"""
-    daily_breakdown = AnalyticsCRUD.get_daily_spending(db, current_user.id, days)
+    daily_breakdown = AnalyticsCache.get(db, current_user.id, "daily", days)
     
     # Calculate summary statistics
     total_spent = sum(day["total_spent"] for day in daily_breakdown)
@@ -81,8 +88,8 @@ def get_daily_spending(
 @router.get("/spending/comparison")
 def get_period_comparison(
     current_period: TimePeriod = Query(TimePeriod.MONTH, description="Current period to analyze"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
 ):
     """Compare spending between current and previous period"""
     
@@ -96,7 +103,7 @@ def get_period_comparison(
     
     if current_period == TimePeriod.ALL_TIME:
         # For all_time, just return current total with no comparison
-        spending_data = AnalyticsCRUD.get_total_spending(db, current_user.id)
+        spending_data = AnalyticsCache.get(db, current_user.id, "total", TimePeriod.ALL_TIME.value)
         return {
             "current_period": current_period.value,
             "current_spending": spending_data["total_spent"],
@@ -107,9 +114,18 @@ def get_period_comparison(
         }
     
     period_days = period_days_map.get(current_period, 30)
-    comparison_data = AnalyticsCRUD.get_period_comparison(db, current_user.id, period_days)
+    comparison_data = AnalyticsCache.get(db, current_user.id, "comparison", period_days)
     
     return {
         "current_period": current_period.value,
         **comparison_data
-    }
\ No newline at end of file
+    }
+
+@router.get("/forecast")
+def get_spending_forecast(
+    alpha: float = Query(0.05, gt=0, lt=1, description="Smoothing factor, higher reacts faster to recent spending"),
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
+):
+    """Project month-end and next month spending per category from spending history"""
+    return SpendingForecast.for_user(db, current_user.id, alpha)
@@ -12,7 +12,9 @@ from home_budget.app.auth import (
     get_password_hash,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from home_budget.app.dependencies import get_current_user_dependency
+from home_budget.app.dependencies import get_current_user_read_dependency
+from home_budget.app.sharding import ShardRouter
+from home_budget.app.replication import ReplicaRouter
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -21,16 +23,21 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
-    db_user = UserCRUD.get_by_email(db, user.email)
+    db_user = ShardRouter.get_entry(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Hash password and create user
+    # Reserve a global user ID in the directory, then create the user on its shard
     hashed_password = get_password_hash(user.password)
-    new_user = UserCRUD.create(db, user, hashed_password)
+    entry = ShardRouter.register(db, user.email)
+    with ShardRouter.user_session(db, entry.shard) as shard_db:
+        new_user = UserCRUD.create(shard_db, user, hashed_password, user_id=entry.id)
+    
+    # Serve the new user's first reads from the primary, replicas may not have them yet
+    ReplicaRouter.note_write(new_user.id)
     
     return new_user
 
@@ -51,7 +58,7 @@ def login_for_access_token(
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -70,19 +77,19 @@ def login_user(user_login: UserLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user = Depends(get_current_user_dependency)):
+def read_users_me(current_user = Depends(get_current_user_read_dependency)):
     """Get current user profile"""
     return current_user
 
 
 @router.get("/protected")
-def protected_route(current_user = Depends(get_current_user_dependency)):
+def protected_route(current_user = Depends(get_current_user_read_dependency)):
     """Example protected route"""
     return {"message": f"Hello {current_user.email}, this is a protected route!"}
\ No newline at end of file
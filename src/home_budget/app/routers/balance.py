@@ -0,0 +1,39 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from home_budget.app.schemas import BalanceAtResponse, BalanceHistoryResponse
+from home_budget.app.crud import LedgerCRUD
+from home_budget.app.dependencies import get_current_user_read_dependency, get_user_read_db
+from home_budget.app.models import User
+from home_budget.app.timestamps import as_utc
+
+router = APIRouter(prefix="/balance", tags=["balance"])
+
+
+@router.get("/at", response_model=BalanceAtResponse)
+def get_balance_at(
+    timestamp: datetime = Query(..., description="Point in time (ISO 8601, UTC unless an offset is given)"),
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
+):
+    """Get the authenticated user's balance at a point in time"""
+    balance = LedgerCRUD.balance_at(db, current_user.id, as_utc(timestamp))
+    if balance is None:
+        raise HTTPException(status_code=404, detail="No balance history at that time")
+    return balance
+
+
+@router.get("/history", response_model=BalanceHistoryResponse)
+def get_balance_history(
+    start_date: Optional[datetime] = Query(None, description="Only changes at or after this time"),
+    end_date: Optional[datetime] = Query(None, description="Only changes at or before this time"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of changes to return"),
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
+):
+    """Get the authenticated user's balance changes, oldest first, with the balance after each"""
+    start_date, end_date = as_utc(start_date), as_utc(end_date)
+    entries = LedgerCRUD.get_history(db, current_user.id, start_date, end_date, limit)
+    return {"start_date": start_date, "end_date": end_date, "entries": entries}
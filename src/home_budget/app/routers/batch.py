@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+
+from home_budget.app.schemas import BatchRequest, BatchResponse, BatchMode, BatchOperationType
+from home_budget.app.crud import CategoryCRUD, ExpenseCRUD
+from home_budget.app.services import ExpenseService
+from home_budget.app.dependencies import get_current_user_dependency, get_user_db
+from home_budget.app.models import User
+from home_budget.app.serialization import expense_to_dict, encoded_response
+from home_budget.app.idempotency import IdempotentRequest, idempotent_request
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+@router.post("", response_model=BatchResponse)
+def apply_batch(
+    batch: BatchRequest,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
+):
+    """Apply a list of expense create, update and delete operations in one transaction.
+
+    In all_or_nothing mode the first failing operation rolls the whole batch back.
+    In best_effort mode failing operations are skipped and the rest are committed.
+    """
+    # A retried batch that was already applied gets the stored response
+    replayed = idempotency.replay(db, current_user)
+    if replayed:
+        return replayed
+
+    operations = batch.operations
+
+    # Resolve every referenced category and expense up front, one query each
+    categories = CategoryCRUD.get_by_ids(db, list({
+        operation.expense.category_id for operation in operations if operation.expense
+    }))
+    known_category_ids = set(categories)
+    ExpenseCRUD.get_by_ids(db, list({
+        operation.expense_id for operation in operations if operation.expense_id
+    }))
+
+    results: List[Dict[str, Any]] = []
+    failed_index = None
+
+    for index, operation in enumerate(operations):
+        result: Dict[str, Any] = {"index": index, "op": operation.op.value, "status_code": 200}
+        try:
+            if operation.op == BatchOperationType.CREATE:
+                db_expense = ExpenseService.create(db, current_user, operation.expense, known_category_ids)
+                result["expense"] = expense_to_dict(db_expense, categories[db_expense.category_id])
+            elif operation.op == BatchOperationType.UPDATE:
+                db_expense = ExpenseService.get_owned(db, operation.expense_id, current_user, "update")
+                ExpenseService.update(db, current_user, db_expense, operation.expense, known_category_ids)
+                result["expense"] = expense_to_dict(db_expense, categories[db_expense.category_id])
+            else:
+                db_expense = ExpenseService.get_owned(db, operation.expense_id, current_user, "delete")
+                result["refunded_amount"] = ExpenseService.delete(db, current_user, db_expense)
+            result["budget_status"] = ExpenseService.budget_status(db, current_user, db_expense)
+        except HTTPException as e:
+            result["status_code"] = e.status_code
+            result["detail"] = e.detail
+            if batch.mode == BatchMode.ALL_OR_NOTHING:
+                failed_index = index
+                results.append(result)
+                break
+        results.append(result)
+
+    if failed_index is not None:
+        db.rollback()
+
+        # Report the rolled back and the never attempted operations as well
+        for result in results[:failed_index]:
+            result.update({"status_code": 424, "expense": None, "refunded_amount": None, "budget_status": None,
+                           "detail": f"Rolled back because operation {failed_index} failed"})
+        for index in range(failed_index + 1, len(operations)):
+            results.append({"index": index, "op": operations[index].op.value, "status_code": 424,
+                            "detail": f"Not applied because operation {failed_index} failed"})
+
+        # Nothing was applied and the key is not stored, so the batch can be retried with it
+        return encoded_response({"mode": batch.mode.value, "committed": False, "results": results})
+
+    return idempotency.commit(db, current_user, {"mode": batch.mode.value, "committed": True, "results": results})
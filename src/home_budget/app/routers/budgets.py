@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from home_budget.app.schemas import BudgetUpdate, BudgetResponse, BudgetOverviewResponse
+from home_budget.app.crud import BudgetCRUD, CategoryCRUD
+from home_budget.app.dependencies import (
+    get_current_user_dependency,
+    get_current_user_read_dependency,
+    get_user_db,
+    get_user_read_db
+)
+from home_budget.app.models import User
+
+router = APIRouter(prefix="/budgets", tags=["budgets"])
+
+
+def current_month() -> str:
+    """Month bucket new expenses count towards (expense dates are stored in UTC)"""
+    return BudgetCRUD.month_key(datetime.now(timezone.utc))
+
+
+@router.get("/", response_model=BudgetOverviewResponse)
+def get_budgets(
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Month as YYYY-MM, defaults to the current month"),
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
+):
+    """Get every category budget of the authenticated user with its month-to-date spending"""
+    month = month or current_month()
+    return {"month": month, "budgets": BudgetCRUD.get_overview(db, current_user.id, month)}
+
+
+@router.get("/{category_id}", response_model=BudgetResponse)
+def get_budget(
+    category_id: int,
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
+):
+    """Get the current month's status of one category budget"""
+    budget_status = BudgetCRUD.get_status(db, current_user.id, category_id, current_month())
+    if not budget_status:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    return budget_status
+
+
+@router.put("/{category_id}", response_model=BudgetResponse)
+def set_budget(
+    category_id: int,
+    budget: BudgetUpdate,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Set the monthly budget of a category"""
+    if not CategoryCRUD.get_by_id(db, category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    
+    BudgetCRUD.set_limit(db, current_user.id, category_id, budget.monthly_limit_cents)
+    return BudgetCRUD.get_status(db, current_user.id, category_id, current_month())
+
+
+@router.delete("/{category_id}")
+def delete_budget(
+    category_id: int,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Remove the monthly budget of a category"""
+    if not BudgetCRUD.delete(db, current_user.id, category_id):
+        raise HTTPException(status_code=404, detail="Budget not found")
+    
+    return {"message": "Budget deleted successfully"}
@@ -2,32 +2,35 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 
-from home_budget.app.database import get_db
+from home_budget.app.dependencies import get_read_db, get_shared_write_db
 from home_budget.app.schemas import CategoryCreate, CategoryResponse
 from home_budget.app.crud import CategoryCRUD
+from home_budget.app.sharding import ShardRouter
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.post("/", response_model=CategoryResponse)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+def create_category(category: CategoryCreate, db: Session = Depends(get_shared_write_db)):
     """Create a new category"""
     # Check if category already exists
     if CategoryCRUD.exists_by_name(db, category.name):
         raise HTTPException(status_code=400, detail="Category already exists")
     
-    # Create new category
-    return CategoryCRUD.create(db, category)
+    # Create new category and copy it to the other shards
+    db_category = CategoryCRUD.create(db, category)
+    ShardRouter.replicate_categories()
+    return db_category
 
 
 @router.get("/", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(get_read_db)):
     """Get all categories"""
     return CategoryCRUD.get_all(db)
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+def get_category(category_id: int, db: Session = Depends(get_read_db)):
     """Get a specific category by ID"""
     category = CategoryCRUD.get_by_id(db, category_id)
     if not category:
@@ -36,7 +39,7 @@ def get_category(category_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{category_id}", response_model=CategoryResponse)
-def update_category(category_id: int, category: CategoryCreate, db: Session = Depends(get_db)):
+def update_category(category_id: int, category: CategoryCreate, db: Session = Depends(get_shared_write_db)):
     """Update a category"""
     # Check if category exists
     if not CategoryCRUD.get_by_id(db, category_id):
@@ -48,13 +51,15 @@ def update_category(category_id: int, category: CategoryCreate, db: Session = De
     
     # Update category
     updated_category = CategoryCRUD.update(db, category_id, category)
+    ShardRouter.replicate_categories()
     return updated_category
 
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db)):
+def delete_category(category_id: int, db: Session = Depends(get_shared_write_db)):
     """Delete a category"""
     if not CategoryCRUD.delete(db, category_id):
         raise HTTPException(status_code=404, detail="Category not found")
+    ShardRouter.replicate_categories()
     
     return {"message": "Category deleted successfully"}
\ No newline at end of file
@@ -1,176 +1,177 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 
-from home_budget.app.database import get_db
-from home_budget.app.schemas import ExpenseCreate, ExpenseResponse
-from home_budget.app.crud import ExpenseCRUD, CategoryCRUD, UserCRUD
-from home_budget.app.dependencies import get_current_user_dependency
+from home_budget.app.schemas import ExpenseCreate, ExpenseResponse, ExpenseWriteResponse, ExpenseChangesResponse
+from home_budget.app.crud import ExpenseCRUD, ChangeFeedCRUD
+from home_budget.app.services import ExpenseService
+from home_budget.app.dependencies import (
+    get_current_user_dependency,
+    get_current_user_read_dependency,
+    get_user_db,
+    get_user_read_db
+)
 from home_budget.app.models import User
+from home_budget.app.serialization import expense_rows_to_dicts, encoded_response
+from home_budget.app.idempotency import IdempotentRequest, idempotent_request
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
 
-@router.post("/", response_model=ExpenseResponse)
+@router.post("/", response_model=ExpenseWriteResponse)
 def create_expense(
     expense: ExpenseCreate, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
     """Create a new expense for the authenticated user"""
     
-    # Validate that the category exists
-    category = CategoryCRUD.get_by_id(db, expense.category_id)
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Validate amount is positive
-    if expense.amount <= 0:
-        raise HTTPException(status_code=400, detail="Expense amount must be positive")
-    
-    # Check if user has sufficient balance
-    if current_user.balance < expense.amount:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Insufficient balance. Current balance: {current_user.balance}, Required: {expense.amount}"
-        )
+    # A retry of an already applied request gets the stored response
+    replayed = idempotency.replay(db, current_user)
+    if replayed:
+        return replayed
     
-    # Create the expense
-    db_expense = ExpenseCRUD.create(db, expense, current_user.id)
-    
-    # Deduct amount from user's balance
-    current_user.balance -= expense.amount
-    db.commit()
-    db.refresh(current_user)
+    db_expense = ExpenseService.create(db, current_user, expense)
+    budget_status = ExpenseService.budget_status(db, current_user, db_expense)
+    db.flush()
+    db.refresh(db_expense)
     
-    return db_expense
+    response = ExpenseWriteResponse.model_validate(
+        {**ExpenseResponse.model_validate(db_expense).model_dump(), "budget_status": budget_status}
+    ).model_dump(mode="json")
+    return idempotency.commit(db, current_user, response)
 
 
 @router.get("/", response_model=List[ExpenseResponse])
 def get_expenses(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency),
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency),
     category_id: Optional[int] = Query(None, description="Filter by category ID"),
     min_amount: Optional[float] = Query(None, description="Filter by minimum amount"),
-    max_amount: Optional[float] = Query(None, description="Filter by maximum amount")
+    max_amount: Optional[float] = Query(None, description="Filter by maximum amount"),
+    start_date: Optional[datetime] = Query(None, description="Only expenses on or after this date"),
+    end_date: Optional[datetime] = Query(None, description="Only expenses before this date")
 ):
     """Get all expenses for the authenticated user with optional filters"""
     
-    # Get user's expenses
-    expenses = ExpenseCRUD.get_by_user(db, current_user.id)
-    
-    # Apply filters if provided
-    if category_id:
-        expenses = [exp for exp in expenses if exp.category_id == category_id]
-    
-    if min_amount is not None:
-        expenses = [exp for exp in expenses if exp.amount >= min_amount]
-    
-    if max_amount is not None:
-        expenses = [exp for exp in expenses if exp.amount <= max_amount]
-    
-    return expenses
+    # Select plain rows with filters applied in SQL (archived expenses only if the range needs them)
+    rows = ExpenseCRUD.get_rows_by_user(
+        db, current_user.id,
+        category_id=category_id,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        start_date=start_date,
+        end_date=end_date
+    )
+    
+    # Serialize rows directly, bypassing per-object response model validation
+    return encoded_response(expense_rows_to_dicts(rows))
+
+
+@router.get("/changes", response_model=ExpenseChangesResponse)
+def get_expense_changes(
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency),
+    since: int = Query(0, ge=0, description="Last change sequence number the client has seen"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of changes to return")
+):
+    """Get expenses created, updated or deleted since a change sequence number.
+    
+    With since=0 the full current expense list is returned as a snapshot. Clients
+    store high_water_mark and pass it as `since` on the next sync.
+    """
+    if since == 0:
+        # Read the high-water mark first so changes racing with the snapshot are re-sent
+        high_water_mark = ChangeFeedCRUD.get_high_water_mark(db, current_user.id)
+        rows = ExpenseCRUD.get_rows_by_user(db, current_user.id)
+        return encoded_response({
+            "since": since,
+            "high_water_mark": high_water_mark,
+            "has_more": False,
+            "upserted": expense_rows_to_dicts(rows),
+            "deleted": []
+        })
+    
+    changes = ChangeFeedCRUD.get_since(db, current_user.id, since, limit)
+    
+    # Only the latest operation per expense matters to the client
+    latest_operations = {}
+    for change in changes:
+        latest_operations[change.expense_id] = change.operation
+    
+    upserted_ids = [eid for eid, op in latest_operations.items() if op != "delete"]
+    deleted_ids = [eid for eid, op in latest_operations.items() if op == "delete"]
+    rows = ExpenseCRUD.get_rows_by_user(db, current_user.id, expense_ids=upserted_ids) if upserted_ids else []
+    
+    return encoded_response({
+        "since": since,
+        "high_water_mark": changes[-1].seq if changes else since,
+        "has_more": len(changes) == limit,
+        "upserted": expense_rows_to_dicts(rows),
+        "deleted": deleted_ids
+    })
 
 
 @router.get("/{expense_id}", response_model=ExpenseResponse)
 def get_expense(
     expense_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
 ):
-    """Get a specific expense by ID (only if owned by the authenticated user)"""
-    
-    expense = ExpenseCRUD.get_by_id(db, expense_id)
-    if not expense:
-        raise HTTPException(status_code=404, detail="Expense not found")
+    """Get a specific expense by ID, archived or not (only if owned by the authenticated user)"""
     
-    # Check if the expense belongs to the current user
-    if expense.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to access this expense")
-    
-    return expense
+    return ExpenseService.get_owned(db, expense_id, current_user, "access", include_archived=True)
 
 
-@router.put("/{expense_id}", response_model=ExpenseResponse)
+@router.put("/{expense_id}", response_model=ExpenseWriteResponse)
 def update_expense(
     expense_id: int,
     expense_update: ExpenseCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
     """Update an expense (only if owned by the authenticated user)"""
     
-    # Get the existing expense
-    db_expense = ExpenseCRUD.get_by_id(db, expense_id)
-    if not db_expense:
-        raise HTTPException(status_code=404, detail="Expense not found")
-    
-    # Check ownership
-    if db_expense.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to update this expense")
-    
-    # Validate category exists
-    category = CategoryCRUD.get_by_id(db, expense_update.category_id)
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Validate amount is positive
-    if expense_update.amount <= 0:
-        raise HTTPException(status_code=400, detail="Expense amount must be positive")
-    
-    # Calculate balance adjustment
-    old_amount = db_expense.amount
-    new_amount = expense_update.amount
-    balance_difference = new_amount - old_amount
-    
-    # Check if user has sufficient balance for the increase
-    if balance_difference > 0 and current_user.balance < balance_difference:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Insufficient balance for update. Current balance: {current_user.balance}, Additional required: {balance_difference}"
-        )
-    
-    # Update the expense
-    db_expense.amount = expense_update.amount
-    db_expense.description = expense_update.description
-    db_expense.category_id = expense_update.category_id
-    
-    # Adjust user's balance
-    current_user.balance -= balance_difference
-    
-    db.commit()
+    replayed = idempotency.replay(db, current_user)
+    if replayed:
+        return replayed
+    
+    db_expense = ExpenseService.get_owned(db, expense_id, current_user, "update")
+    ExpenseService.update(db, current_user, db_expense, expense_update)
+    budget_status = ExpenseService.budget_status(db, current_user, db_expense)
+    
+    # Reload the updated expense (and its new category) inside the transaction
+    db.flush()
     db.refresh(db_expense)
-    db.refresh(current_user)
     
-    return db_expense
+    response = ExpenseWriteResponse.model_validate(
+        {**ExpenseResponse.model_validate(db_expense).model_dump(), "budget_status": budget_status}
+    ).model_dump(mode="json")
+    return idempotency.commit(db, current_user, response)
 
 
 @router.delete("/{expense_id}")
 def delete_expense(
     expense_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_dependency)
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency),
+    idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
     """Delete an expense (only if owned by the authenticated user)"""
     
-    # Get the expense
-    db_expense = ExpenseCRUD.get_by_id(db, expense_id)
-    if not db_expense:
-        raise HTTPException(status_code=404, detail="Expense not found")
-    
-    # Check ownership
-    if db_expense.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this expense")
-    
-    # Store the amount to refund
-    refund_amount = db_expense.amount
-    
-    # Delete the expense
-    ExpenseCRUD.delete(db, expense_id)
+    replayed = idempotency.replay(db, current_user)
+    if replayed:
+        return replayed
     
-    # Refund the amount to user's balance
-    current_user.balance += refund_amount
-    db.commit()
-    db.refresh(current_user)
+    db_expense = ExpenseService.get_owned(db, expense_id, current_user, "delete")
+    refund_amount = ExpenseService.delete(db, current_user, db_expense)
+    budget_status = ExpenseService.budget_status(db, current_user, db_expense)
     
-    return {"message": "Expense deleted successfully", "refunded_amount": refund_amount}
\ No newline at end of file
+    return idempotency.commit(db, current_user, {
+        "message": "Expense deleted successfully",
+        "refunded_amount": refund_amount,
+        "budget_status": budget_status
+    })
\ No newline at end of file
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+
+from home_budget.app.schemas import RecurringExpenseCreate, RecurringExpenseResponse
+from home_budget.app.crud import RecurringCRUD, CategoryCRUD
+from home_budget.app.dependencies import (
+    get_current_user_dependency,
+    get_current_user_read_dependency,
+    get_user_db,
+    get_user_read_db
+)
+from home_budget.app.models import User, RecurringExpense
+from home_budget.app.timestamps import as_utc
+
+router = APIRouter(prefix="/recurring", tags=["recurring"])
+
+
+def get_owned_rule(db: Session, rule_id: int, user: User, action: str) -> RecurringExpense:
+    """Get a recurring expense rule owned by the user or raise 404/403"""
+    db_rule = RecurringCRUD.get_by_id(db, rule_id)
+    if not db_rule:
+        raise HTTPException(status_code=404, detail="Recurring expense not found")
+    if db_rule.owner_id != user.id:
+        raise HTTPException(status_code=403, detail=f"Not authorized to {action} this recurring expense")
+    return db_rule
+
+
+@router.post("/", response_model=RecurringExpenseResponse)
+def create_recurring_expense(
+    rule: RecurringExpenseCreate,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Create a recurring expense rule; occurrences are created by the scheduler from its start date on"""
+    if not CategoryCRUD.get_by_id(db, rule.category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+
+    start_date = as_utc(rule.start_date) or datetime.now(timezone.utc).replace(tzinfo=None)
+    rule.end_date = as_utc(rule.end_date)
+    if rule.end_date is not None and rule.end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    return RecurringCRUD.create(db, rule, current_user.id, start_date)
+
+
+@router.get("/", response_model=List[RecurringExpenseResponse])
+def get_recurring_expenses(
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
+):
+    """Get the authenticated user's recurring expense rules"""
+    return RecurringCRUD.get_by_user(db, current_user.id)
+
+
+@router.get("/{rule_id}", response_model=RecurringExpenseResponse)
+def get_recurring_expense(
+    rule_id: int,
+    db: Session = Depends(get_user_read_db),
+    current_user: User = Depends(get_current_user_read_dependency)
+):
+    """Get one recurring expense rule"""
+    return get_owned_rule(db, rule_id, current_user, "access")
+
+
+@router.delete("/{rule_id}")
+def delete_recurring_expense(
+    rule_id: int,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Stop a recurring expense; expenses it already created are kept"""
+    get_owned_rule(db, rule_id, current_user, "delete")
+    RecurringCRUD.delete(db, rule_id)
+    return {"message": "Recurring expense deleted successfully"}
@@ -1,6 +1,26 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
+
+from home_budget.app.money import to_cents, from_cents
+
+
+class CentsResponse(BaseModel):
+    """Response model read from ORM objects that store money as integer <field>_cents columns"""
+
+    @model_validator(mode="before")
+    @classmethod
+    def read_cents(cls, data):
+        if isinstance(data, dict):
+            return data
+        values = {}
+        for name in cls.model_fields:
+            if hasattr(data, f"{name}_cents"):
+                values[name] = from_cents(getattr(data, f"{name}_cents"))
+            elif hasattr(data, name):
+                values[name] = getattr(data, name)
+        return values
 
 
 # User schemas
@@ -20,7 +40,7 @@ class UserCreate(UserBase):
         return v
 
 
-class UserResponse(UserBase):
+class UserResponse(UserBase, CentsResponse):
     id: int
     balance: float
     
@@ -68,8 +88,14 @@ class ExpenseCreate(ExpenseBase):
     def validate_amount(cls, v):
         if v <= 0:
             raise ValueError('Expense amount must be positive')
+        if to_cents(v) <= 0:
+            raise ValueError('Expense amount must be at least 0.01')
         return v
     
+    @property
+    def amount_cents(self) -> int:
+        return to_cents(self.amount)
+    
     @field_validator('description')
     def validate_description(cls, v):
         if not v or len(v.strip()) == 0:
@@ -82,7 +108,7 @@ class ExpenseCreate(ExpenseBase):
             raise ValueError('Category ID must be positive')
         return v
 
-class ExpenseResponse(ExpenseBase):
+class ExpenseResponse(ExpenseBase, CentsResponse):
     id: int
     date: datetime
     owner_id: int
@@ -92,6 +118,153 @@ class ExpenseResponse(ExpenseBase):
         from_attributes = True
 
 
+class BudgetStatus(BaseModel):
+    category_id: int
+    month: str
+    monthly_limit: float
+    spent: float
+    remaining: float
+    over_budget: bool
+
+
+class ExpenseWriteResponse(ExpenseResponse):
+    budget_status: Optional[BudgetStatus] = None
+
+
+class ExpenseChangesResponse(BaseModel):
+    since: int
+    high_water_mark: int
+    has_more: bool
+    upserted: List[ExpenseResponse]
+    deleted: List[int]
+
+
+# Budget schemas
+class BudgetUpdate(BaseModel):
+    monthly_limit: float = Field(..., gt=0, description="Monthly spending limit must be positive")
+    
+    @property
+    def monthly_limit_cents(self) -> int:
+        return to_cents(self.monthly_limit)
+
+
+class BudgetResponse(BudgetStatus):
+    category_name: str
+
+
+class BudgetOverviewResponse(BaseModel):
+    month: str
+    budgets: List[BudgetResponse]
+
+
+# Balance ledger schemas
+class BalanceAtResponse(BaseModel):
+    timestamp: datetime
+    balance: float
+    seq: int
+    last_change_at: datetime
+
+
+class BalanceEntryResponse(BaseModel):
+    seq: int
+    created_at: datetime
+    amount: float
+    reason: str
+    expense_id: Optional[int] = None
+    balance_after: float
+
+
+class BalanceHistoryResponse(BaseModel):
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    entries: List[BalanceEntryResponse]
+
+
+# Recurring expense schemas
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    CUSTOM = "custom"
+
+
+class RecurringExpenseCreate(ExpenseCreate):
+    frequency: RecurrenceFrequency
+    interval_days: Optional[int] = Field(None, ge=1, le=3660, description="Days between occurrences, custom rules only")
+    start_date: Optional[datetime] = Field(None, description="First occurrence, defaults to now")
+    end_date: Optional[datetime] = Field(None, description="No occurrences after this moment")
+    
+    @model_validator(mode='after')
+    def validate_schedule(self):
+        if self.frequency == RecurrenceFrequency.CUSTOM and self.interval_days is None:
+            raise ValueError('interval_days is required for custom rules')
+        if self.frequency != RecurrenceFrequency.CUSTOM and self.interval_days is not None:
+            raise ValueError('interval_days is only allowed for custom rules')
+        return self
+
+
+class RecurringExpenseResponse(ExpenseBase, CentsResponse):
+    id: int
+    owner_id: int
+    frequency: RecurrenceFrequency
+    interval_days: Optional[int] = None
+    start_date: datetime
+    end_date: Optional[datetime] = None
+    occurrences: int
+    skipped_occurrences: int
+    next_run_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# Batch schemas
+class BatchOperationType(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class BatchMode(str, Enum):
+    ALL_OR_NOTHING = "all_or_nothing"
+    BEST_EFFORT = "best_effort"
+
+
+class BatchOperation(BaseModel):
+    op: BatchOperationType
+    expense_id: Optional[int] = Field(None, gt=0, description="Target expense for update and delete")
+    expense: Optional[ExpenseCreate] = Field(None, description="Expense data for create and update")
+    
+    @model_validator(mode='after')
+    def validate_operation(self):
+        if self.op != BatchOperationType.CREATE and self.expense_id is None:
+            raise ValueError(f'expense_id is required for {self.op.value}')
+        if self.op != BatchOperationType.DELETE and self.expense is None:
+            raise ValueError(f'expense is required for {self.op.value}')
+        return self
+
+
+class BatchRequest(BaseModel):
+    mode: BatchMode = BatchMode.ALL_OR_NOTHING
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=500)
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: BatchOperationType
+    status_code: int
+    expense: Optional[ExpenseResponse] = None
+    refunded_amount: Optional[float] = None
+    budget_status: Optional[BudgetStatus] = None
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    mode: BatchMode
+    committed: bool
+    results: List[BatchOperationResult]
+
+
 # Auth schemas
 class Token(BaseModel):
     access_token: str
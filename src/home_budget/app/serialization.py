@@ -0,0 +1,100 @@
+from contextvars import ContextVar
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List
+
+import msgpack
+import orjson
+from fastapi import Response
+from sqlalchemy import Row
+
+from home_budget.app.models import Expense, Category
+from home_budget.app.money import from_cents
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Response media type the current request negotiated, set by ContentNegotiationMiddleware
+negotiated_media_type: ContextVar[str] = ContextVar("negotiated_media_type", default=JSON_MEDIA_TYPE)
+
+
+def expense_row_to_dict(row: Row) -> Dict[str, Any]:
+    """Convert an expense row from ExpenseCRUD.get_rows_by_user to the ExpenseResponse shape"""
+    return {
+        "amount": from_cents(row.amount_cents),
+        "description": row.description,
+        "category_id": row.category_id,
+        "id": row.id,
+        "date": row.date,
+        "owner_id": row.owner_id,
+        "category": {
+            "name": row.category_name,
+            "id": row.category_id
+        }
+    }
+
+
+def expense_to_dict(expense: Expense, category: Category) -> Dict[str, Any]:
+    """Convert a flushed Expense and its category to the ExpenseResponse shape"""
+    return {
+        "amount": from_cents(expense.amount_cents),
+        "description": expense.description,
+        "category_id": category.id,
+        "id": expense.id,
+        # SQLite hands dates back naive, so match what a read of this row would return
+        "date": expense.date.replace(tzinfo=None),
+        "owner_id": expense.owner_id,
+        "category": {
+            "name": category.name,
+            "id": category.id
+        }
+    }
+
+
+def expense_rows_to_dicts(rows: Iterable[Row]) -> List[Dict[str, Any]]:
+    """Convert expense rows to plain dicts, skipping per-object pydantic validation"""
+    expenses = [expense_row_to_dict(row) for row in rows]
+    if negotiated_media_type.get() == MSGPACK_MEDIA_TYPE:
+        format_dates(expenses, "date")
+    return expenses
+
+
+def format_dates(items: List[Dict[str, Any]], field: str):
+    """Replace items' datetimes in field with the ISO 8601 strings the JSON responses show, in place.
+
+    MessagePack has no datetime type; formatting a whole list in one orjson call is
+    about ten times faster than a per-value default= callback while packing.
+    """
+    formatted = orjson.loads(orjson.dumps([item[field] for item in items]))
+    for item, value in zip(items, formatted):
+        item[field] = value
+
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """Encode already-shaped content with orjson and wrap it in a JSON response"""
+    return Response(
+        content=orjson.dumps(content),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Encode values MessagePack has no type for the same way they appear in JSON"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def msgpack_dumps(content: Any) -> bytes:
+    """Encode content as MessagePack, with dates as ISO 8601 strings like the JSON responses"""
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+def encoded_response(content: Any, status_code: int = 200) -> Response:
+    """Encode already-shaped content as JSON, or as MessagePack when the client negotiated it"""
+    if negotiated_media_type.get() == MSGPACK_MEDIA_TYPE:
+        return Response(content=msgpack_dumps(content), status_code=status_code, media_type=MSGPACK_MEDIA_TYPE)
+    return json_response(content, status_code)
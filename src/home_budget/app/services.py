@@ -0,0 +1,155 @@
+from typing import Any, Dict, Optional, Set, Union
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from home_budget.app.models import User, Expense, ArchivedExpense
+from home_budget.app.schemas import ExpenseCreate
+from home_budget.app.crud import (
+    ExpenseCRUD,
+    CategoryCRUD,
+    ChangeFeedCRUD,
+    BudgetCRUD,
+    LedgerCRUD,
+    ArchiveCRUD,
+    UserCRUD
+)
+from home_budget.app.money import from_cents
+
+
+class ExpenseService:
+    """Expense write paths shared by the expense and batch routers.
+
+    Methods validate first and only then touch the session, so a rejected operation
+    leaves it unchanged. They flush but never commit; the caller owns the transaction.
+    """
+
+    @staticmethod
+    def get_owned(
+        db: Session, expense_id: int, user: User, action: str, include_archived: bool = False
+    ) -> Union[Expense, ArchivedExpense]:
+        """Get an expense owned by the user or raise 404/403.
+
+        Archived expenses are read-only, so they are only looked up when include_archived is set.
+        """
+        db_expense = ExpenseCRUD.get_by_id(db, expense_id)
+        if not db_expense and include_archived:
+            db_expense = ArchiveCRUD.get_by_id(db, expense_id)
+        if not db_expense:
+            raise HTTPException(status_code=404, detail="Expense not found")
+
+        # Check ownership
+        if db_expense.owner_id != user.id:
+            raise HTTPException(status_code=403, detail=f"Not authorized to {action} this expense")
+
+        return db_expense
+
+    @staticmethod
+    def check_category(db: Session, category_id: int, known_category_ids: Optional[Set[int]] = None):
+        """Raise 404 unless the category exists, using pre-resolved IDs when given"""
+        if known_category_ids is not None:
+            exists = category_id in known_category_ids
+        else:
+            exists = CategoryCRUD.get_by_id(db, category_id) is not None
+        if not exists:
+            raise HTTPException(status_code=404, detail="Category not found")
+
+    @staticmethod
+    def create(
+        db: Session,
+        user: User,
+        expense: ExpenseCreate,
+        known_category_ids: Optional[Set[int]] = None
+    ) -> Expense:
+        """Create an expense and deduct it from the user's balance"""
+        ExpenseService.check_category(db, expense.category_id, known_category_ids)
+
+        # Validate amount is positive
+        amount_cents = expense.amount_cents
+        if amount_cents <= 0:
+            raise HTTPException(status_code=400, detail="Expense amount must be positive")
+
+        # Check if user has sufficient balance, as of now rather than when the user was loaded
+        if UserCRUD.refresh_balance(db, user) < amount_cents:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient balance. Current balance: {from_cents(user.balance_cents)}, Required: {from_cents(amount_cents)}"
+            )
+
+        db_expense = ExpenseCRUD.create(db, expense, user.id, commit=False)
+
+        # Deduct amount from user's balance and record the change for syncing clients
+        UserCRUD.adjust_balance(db, user, -amount_cents)
+        LedgerCRUD.record(db, user, -amount_cents, "expense_create", db_expense.id)
+        ChangeFeedCRUD.record(db, user.id, db_expense.id, "create")
+        BudgetCRUD.add_to_month_total(
+            db, user.id, db_expense.category_id, BudgetCRUD.month_key(db_expense.date), amount_cents, 1
+        )
+
+        return db_expense
+
+    @staticmethod
+    def update(
+        db: Session,
+        user: User,
+        db_expense: Expense,
+        expense_update: ExpenseCreate,
+        known_category_ids: Optional[Set[int]] = None
+    ) -> Expense:
+        """Update an owned expense and adjust the user's balance by the difference"""
+        ExpenseService.check_category(db, expense_update.category_id, known_category_ids)
+
+        # Validate amount is positive
+        amount_cents = expense_update.amount_cents
+        if amount_cents <= 0:
+            raise HTTPException(status_code=400, detail="Expense amount must be positive")
+
+        # Calculate balance adjustment
+        balance_difference = amount_cents - db_expense.amount_cents
+
+        # Check if user has sufficient balance for the increase
+        if balance_difference > 0 and UserCRUD.refresh_balance(db, user) < balance_difference:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient balance for update. Current balance: {from_cents(user.balance_cents)}, Additional required: {from_cents(balance_difference)}"
+            )
+
+        # Move the old amount out of and the new amount into the month-to-date totals
+        month = BudgetCRUD.month_key(db_expense.date)
+        BudgetCRUD.add_to_month_total(db, user.id, db_expense.category_id, month, -db_expense.amount_cents, -1)
+        BudgetCRUD.add_to_month_total(db, user.id, expense_update.category_id, month, amount_cents, 1)
+
+        # Update the expense
+        db_expense.amount_cents = amount_cents
+        db_expense.description = expense_update.description
+        db_expense.category_id = expense_update.category_id
+
+        # Adjust user's balance
+        if balance_difference:
+            UserCRUD.adjust_balance(db, user, -balance_difference)
+            LedgerCRUD.record(db, user, -balance_difference, "expense_update", db_expense.id)
+        ChangeFeedCRUD.record(db, user.id, db_expense.id, "update")
+
+        return db_expense
+
+    @staticmethod
+    def delete(db: Session, user: User, db_expense: Expense) -> float:
+        """Delete an owned expense, refund it to the user's balance and return the refund"""
+        expense_id = db_expense.id
+        refund_amount = db_expense.amount_cents
+        BudgetCRUD.add_to_month_total(
+            db, user.id, db_expense.category_id, BudgetCRUD.month_key(db_expense.date), -refund_amount, -1
+        )
+
+        ExpenseCRUD.delete(db, expense_id, commit=False)
+
+        # Refund the amount to user's balance and leave a tombstone for syncing clients
+        UserCRUD.adjust_balance(db, user, refund_amount)
+        LedgerCRUD.record(db, user, refund_amount, "expense_delete", expense_id)
+        ChangeFeedCRUD.record(db, user.id, expense_id, "delete")
+
+        return from_cents(refund_amount)
+
+    @staticmethod
+    def budget_status(db: Session, user: User, db_expense: Expense) -> Optional[Dict[str, Any]]:
+        """Budget status of the expense's category for the expense's month"""
+        return BudgetCRUD.get_status(db, user.id, db_expense.category_id, BudgetCRUD.month_key(db_expense.date))
@@ -0,0 +1,260 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import select, insert, delete, func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from home_budget.app.database import Base, engines, session_factories, SessionLocal
+from home_budget.app.migrations import migrate_money_to_cents, migrate_expense_ids_autoincrement
+from home_budget.app.models import User, UserShard, Category, Expense, ArchivedExpense, ArchiveState, ExpenseChange
+
+SHARD_COUNT = len(engines)
+
+
+class ShardRouter:
+    """Maps users to database shards through the user directory on shard 0.
+
+    Users without a directory entry predate sharding and live on shard 0.
+    """
+
+    @staticmethod
+    def default_shard(user_id: int) -> int:
+        """Shard a user is placed on by default"""
+        return user_id % SHARD_COUNT
+
+    @staticmethod
+    def session(shard: int) -> Session:
+        """Open a new session on a shard"""
+        return session_factories[shard]()
+
+    @staticmethod
+    def get_entry(directory_db: Session, user_id: Optional[int] = None, email: Optional[str] = None) -> Optional[UserShard]:
+        """Get a user's directory entry by ID or email"""
+        if user_id is not None:
+            return directory_db.get(UserShard, user_id)
+        return directory_db.query(UserShard).filter(UserShard.email == email).first()
+
+    @staticmethod
+    def shard_for_user(directory_db: Session, user_id: Optional[int] = None, email: Optional[str] = None) -> int:
+        """Get the shard holding a user (shard 0 when unsharded or unknown)"""
+        if SHARD_COUNT == 1:
+            return 0
+        entry = ShardRouter.get_entry(directory_db, user_id=user_id, email=email)
+        return entry.shard if entry else 0
+
+    @staticmethod
+    @contextmanager
+    def user_session(directory_db: Session, shard: int) -> Iterator[Session]:
+        """Session on the given shard, reusing the directory session for shard 0"""
+        if shard == 0:
+            yield directory_db
+            return
+        db = ShardRouter.session(shard)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def register(directory_db: Session, email: str) -> UserShard:
+        """Allocate a global user ID for an email and place the user on its default shard"""
+        entry = UserShard(email=email, shard=0)
+        directory_db.add(entry)
+        directory_db.flush()
+        entry.shard = ShardRouter.default_shard(entry.id)
+        directory_db.commit()
+        return entry
+
+    @staticmethod
+    def backfill_directory():
+        """Add directory entries for users created before sharding (all on shard 0)"""
+        db = SessionLocal()
+        try:
+            known = select(UserShard.id)
+            legacy_users = db.query(User.id, User.email).filter(User.id.not_in(known)).all()
+            for user_id, email in legacy_users:
+                db.add(UserShard(id=user_id, email=email, shard=0))
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def replicate_categories():
+        """Copy the categories from shard 0 to every other shard, keeping their IDs"""
+        if SHARD_COUNT == 1:
+            return
+        table = Category.__table__
+        with engines[0].connect() as source:
+            rows = [dict(row) for row in source.execute(select(table)).mappings()]
+        for shard_engine in engines[1:]:
+            with shard_engine.begin() as target:
+                target.execute(delete(table))
+                if rows:
+                    target.execute(insert(table), rows)
+
+    @staticmethod
+    def _owned_tables() -> List:
+        """Tables holding per-user rows, identified by their owner_id column"""
+        return [table for table in Base.metadata.sorted_tables if "owner_id" in table.c]
+
+    @staticmethod
+    def move_user(user_id: int, target_shard: int) -> bool:
+        """Move a user and all their rows to another shard.
+
+        Expense IDs are only unique within a shard, so moved expenses get new IDs on the
+        target. The user's past change-feed entries are copied as they were, followed by
+        a delete of every old ID and then a create of every new one; an old ID may equal
+        another moved expense's new ID, so all deletes come first for syncing clients to
+        converge. The target's archive watermark is raised to the source's so the moved
+        archived expenses stay visible. Returns False if the user is already there.
+        Pause the user's writes while moving them; the copy spans two databases.
+        """
+        directory_db = SessionLocal()
+        try:
+            entry = ShardRouter.get_entry(directory_db, user_id=user_id)
+            source_shard = entry.shard if entry else 0
+            if source_shard == target_shard:
+                return False
+
+            users = User.__table__
+            owned_tables = ShardRouter._owned_tables()
+            expense_tables = {Expense.__table__.name, ArchivedExpense.__table__.name}
+
+            with engines[source_shard].connect() as source:
+                user_rows = [dict(row) for row in source.execute(
+                    select(users).where(users.c.id == user_id)
+                ).mappings()]
+                owned_rows = {
+                    table.name: [dict(row) for row in source.execute(
+                        select(table).where(table.c.owner_id == user_id)
+                    ).mappings()]
+                    for table in owned_tables
+                }
+                archive_state = ArchiveState.__table__
+                archived_before = source.execute(
+                    select(archive_state.c.archived_before).where(archive_state.c.id == 1)
+                ).scalar()
+
+            with engines[target_shard].begin() as target:
+                # Hot and archived expenses share one ID space; continue after both
+                next_id = max(
+                    target.execute(select(func.max(Expense.__table__.c.id))).scalar() or 0,
+                    target.execute(select(func.max(ArchivedExpense.__table__.c.id))).scalar() or 0
+                ) + 1
+                expense_ids: Dict[int, int] = {}
+                for name in expense_tables:
+                    for row in owned_rows[name]:
+                        expense_ids[row["id"]] = next_id
+                        row["id"] = next_id
+                        next_id += 1
+
+                target.execute(insert(users), user_rows)
+                for table in owned_tables:
+                    rows = owned_rows[table.name]
+                    for row in rows:
+                        # Other per-user rows only have internal IDs, let the target assign them
+                        if table.name not in expense_tables:
+                            row.pop("id", None)
+                        # Past change-feed entries keep the IDs clients saw at the time
+                        if table.name != ExpenseChange.__table__.name and row.get("expense_id") in expense_ids:
+                            row["expense_id"] = expense_ids[row["expense_id"]]
+                    if rows:
+                        target.execute(insert(table), rows)
+
+                # Tell syncing clients about the re-keyed expenses
+                changes = ExpenseChange.__table__
+                seq = max((row["seq"] for row in owned_rows[changes.name]), default=0)
+                feed = [
+                    {"expense_id": old_id, "operation": "delete"} for old_id in expense_ids
+                ] + [
+                    {"expense_id": new_id, "operation": "create"} for new_id in expense_ids.values()
+                ]
+                for offset, change in enumerate(feed, start=1):
+                    change.update(owner_id=user_id, seq=seq + offset)
+                if feed:
+                    target.execute(insert(changes), feed)
+
+                # Reads only look at the archive when a range reaches past the shard's watermark,
+                # so the target's must cover the moved archived expenses
+                if archived_before is not None:
+                    raise_watermark = sqlite_insert(archive_state).values(id=1, archived_before=archived_before)
+                    target.execute(raise_watermark.on_conflict_do_update(
+                        index_elements=["id"],
+                        set_={"archived_before": raise_watermark.excluded.archived_before},
+                        where=or_(
+                            archive_state.c.archived_before.is_(None),
+                            archive_state.c.archived_before < raise_watermark.excluded.archived_before
+                        )
+                    ))
+
+            # Switch the directory over before removing the source copy
+            if entry is None:
+                entry = UserShard(id=user_id, email=user_rows[0]["email"])
+                directory_db.add(entry)
+            entry.shard = target_shard
+            directory_db.commit()
+
+            with engines[source_shard].begin() as source:
+                for table in reversed(owned_tables):
+                    source.execute(delete(table).where(table.c.owner_id == user_id))
+                source.execute(delete(users).where(users.c.id == user_id))
+
+            return True
+        finally:
+            directory_db.close()
+
+    @staticmethod
+    def rebalance() -> int:
+        """Move every user to their default shard for the current shard count"""
+        ShardRouter.backfill_directory()
+        directory_db = SessionLocal()
+        try:
+            misplaced = [
+                (entry.id, ShardRouter.default_shard(entry.id))
+                for entry in directory_db.query(UserShard).all()
+                if entry.shard != ShardRouter.default_shard(entry.id)
+            ]
+        finally:
+            directory_db.close()
+
+        moved = 0
+        for user_id, target_shard in misplaced:
+            if ShardRouter.move_user(user_id, target_shard):
+                print(f"Moved user {user_id} to shard {target_shard}")
+                moved += 1
+        return moved
+
+
+def for_each_shard(task: Callable[[Session], None]):
+    """Run task with a session on every shard primary"""
+    for session_factory in session_factories:
+        db = session_factory()
+        try:
+            task(db)
+        finally:
+            db.close()
+
+
+def create_all_tables():
+    """Create the database tables on every shard, migrating existing ones to the current schema"""
+    for shard_engine in engines:
+        Base.metadata.create_all(bind=shard_engine)
+        migrate_money_to_cents(shard_engine)
+        migrate_expense_ids_autoincrement(shard_engine, Expense.__table__, ArchivedExpense.__table__)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=shard_engine, checkfirst=True)
+
+
+def init_shards():
+    """Backfill the user directory and copy the categories to every shard"""
+    ShardRouter.backfill_directory()
+    ShardRouter.replicate_categories()
+
+
+if __name__ == "__main__":
+    create_all_tables()
+    init_shards()
+    moved = ShardRouter.rebalance()
+    print(f"Rebalanced {moved} users across {SHARD_COUNT} shards")
@@ -0,0 +1,11 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+# Timestamps are stored as naive UTC; these convert at the API edge
+
+
+def as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to naive UTC; naive input is taken to be UTC already"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
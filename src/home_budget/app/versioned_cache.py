@@ -0,0 +1,68 @@
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class VersionedCache:
+    """Thread-safe LRU cache whose entries are only valid for the data version they were computed from.
+
+    Callers pass the current version of the data behind a key, for example a user's
+    change-feed high-water mark; an entry stored for any other version is a miss, so
+    a write invalidates by moving the version. Entries older than `ttl` seconds are
+    misses too, and a result computed from an older version never replaces a newer one.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (data version, monotonic time stored, value)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, Any]]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0}
+
+    def get(self, key: Hashable, version: Any, default: Any = None) -> Any:
+        """Get the value stored for key at this version, or default"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if (
+                cached is not None
+                and cached[0] == version
+                and (self.ttl is None or time.monotonic() - cached[1] < self.ttl)
+            ):
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return cached[2]
+            self.counters["misses"] += 1
+            return default
+
+    def put(self, key: Hashable, version: Any, value: Any):
+        """Store a value computed from version, unless a newer version is already stored"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] > version:
+                return
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, version: Any, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Get the value for key at this version, computing and storing it on a miss; returns (value, hit)"""
+        value = self.get(key, version, _MISSING)
+        if value is not _MISSING:
+            return value, True
+        value = compute()
+        self.put(key, version, value)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), **self.counters}
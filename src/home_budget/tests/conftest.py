@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+import pytest
+
+# The app reads its database URLs when imported, so point it at a scratch directory
+# with a second shard first
+_workdir = tempfile.mkdtemp(prefix="home_budget_tests_")
+os.chdir(_workdir)
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ["SHARD_DATABASE_URLS"] = f"sqlite:///{_workdir}/shard_1.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from home_budget.app.analytics_cache import AnalyticsCache  # noqa: E402
+from home_budget.app.database import Base, engines  # noqa: E402
+from home_budget.app.forecast import SpendingForecast  # noqa: E402
+from home_budget.app.init_categories import create_predefined_categories  # noqa: E402
+from home_budget.app.main import app  # noqa: E402
+from home_budget.app.sharding import create_all_tables, init_shards  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    """Test client on empty shards holding only the predefined categories"""
+    for shard_engine in engines:
+        Base.metadata.drop_all(bind=shard_engine)
+    create_all_tables()
+    create_predefined_categories()
+    init_shards()
+    AnalyticsCache._cache.clear()
+    SpendingForecast._cache.clear()
+    # No lifespan: background tasks stay off and tests run them explicitly
+    return TestClient(app)
+
+
+@pytest.fixture
+def login(client):
+    """Register and log in a user, returning their auth headers"""
+    def login(email: str) -> dict:
+        client.post("/auth/register", json={"email": email, "password": "secret1"})
+        token = client.post("/auth/login", json={"email": email, "password": "secret1"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return login
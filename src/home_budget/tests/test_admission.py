@@ -0,0 +1,26 @@
+from unittest import mock
+
+from home_budget.app.admission import TokenBucket
+
+
+def at(moment: float):
+    return mock.patch("home_budget.app.admission.time.monotonic", return_value=moment)
+
+
+def test_token_bucket_evicts_idle_full_buckets():
+    with at(100.0):
+        bucket = TokenBucket(rate=2.0, burst=4.0, sweep_interval=10.0)
+        for user_id in range(1000):
+            assert bucket.take(f"user:{user_id}") == 0.0
+    with at(109.0):
+        for _ in range(4):
+            assert bucket.take("user:recent") == 0.0
+    assert len(bucket._buckets) == 1001
+
+    # The sweep drops every refilled bucket and keeps the one still draining
+    with at(110.0):
+        bucket.take("user:new")
+        assert sorted(bucket._buckets) == ["user:new", "user:recent"]
+        for _ in range(2):
+            assert bucket.take("user:recent") == 0.0
+        assert bucket.take("user:recent") > 0
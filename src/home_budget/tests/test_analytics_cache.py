@@ -0,0 +1,40 @@
+from home_budget.app.analytics_cache import AnalyticsCache, AnalyticsWarmup
+from home_budget.app.database import session_factories
+from home_budget.app.models import User
+from home_budget.app.schemas import ExpenseCreate
+from home_budget.app.services import ExpenseService
+from home_budget.app.versioned_cache import VersionedCache
+
+
+def test_versioned_cache_keeps_the_newest_version():
+    cache = VersionedCache(max_size=2)
+    cache.put("a", 2, "new")
+    cache.put("a", 1, "stale")
+    assert cache.get("a", 2) == "new"
+    assert cache.get("a", 1) is None
+
+    cache.put("b", 1, "b")
+    cache.put("c", 1, "c")
+    assert cache.get("a", 2) is None  # Least recently used, evicted
+    assert cache.metrics() == {"entries": 2, "hits": 1, "misses": 2}
+
+
+def test_expense_write_invalidates_warmed_analytics(client, login):
+    headers = login("alice@example.com")
+    client.post("/expenses/", json={"amount": 10, "description": "Lunch", "category_id": 1}, headers=headers)
+    AnalyticsWarmup.warm_user(1)
+    warmed = AnalyticsCache.metrics()
+
+    # User 1 lives on shard 1
+    db = session_factories[1]()
+    try:
+        assert AnalyticsCache.get(db, 1, "total", "all_time")["total_spent"] == 10
+        assert AnalyticsCache.metrics()["hits"] == warmed["hits"] + 1
+
+        ExpenseService.create(db, db.get(User, 1), ExpenseCreate(amount=5, description="Coffee", category_id=1))
+        db.commit()
+
+        assert AnalyticsCache.get(db, 1, "total", "all_time")["total_spent"] == 15
+        assert AnalyticsCache.metrics()["misses"] == warmed["misses"] + 1
+    finally:
+        db.close()
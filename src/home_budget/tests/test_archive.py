@@ -0,0 +1,56 @@
+from sqlalchemy import create_engine, text
+
+from home_budget.app.archive import archive_old_expenses
+from home_budget.app.database import Base
+from home_budget.app.migrations import migrate_expense_ids_autoincrement
+from home_budget.app.models import Expense, ArchivedExpense
+
+
+def test_archived_expense_ids_are_not_reused(client, login):
+    headers = login("alice@example.com")
+    for amount in (10, 20):
+        client.post("/expenses/", json={"amount": amount, "description": "Rent", "category_id": 1}, headers=headers)
+
+    # A negative age archives everything, including the newest expense
+    assert archive_old_expenses(archive_after_days=-1) == 2
+
+    created = client.post("/expenses/", json={"amount": 5, "description": "Lunch", "category_id": 1}, headers=headers)
+    assert created.json()["id"] == 3
+
+
+def test_archived_expense_is_readable_but_not_writable(client, login):
+    headers = login("alice@example.com")
+    client.post("/expenses/", json={"amount": 10, "description": "Rent", "category_id": 1}, headers=headers)
+    archive_old_expenses(archive_after_days=-1)
+
+    response = client.get("/expenses/1", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["amount"] == 10
+    assert response.json()["category"]["id"] == 1
+
+    update = {"amount": 11, "description": "Rent", "category_id": 1}
+    assert client.put("/expenses/1", json=update, headers=headers).status_code == 404
+    assert client.delete("/expenses/1", headers=headers).status_code == 404
+
+
+def test_migration_continues_ids_after_archived_ones(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # The expenses table as created before IDs were AUTOINCREMENT
+        connection.execute(text("DROP TABLE expenses"))
+        connection.execute(text(
+            "CREATE TABLE expenses (id INTEGER PRIMARY KEY, amount_cents INTEGER NOT NULL, description VARCHAR, "
+            "date DATETIME, owner_id INTEGER, category_id INTEGER)"
+        ))
+        connection.execute(text("INSERT INTO expenses (id, amount_cents, owner_id) VALUES (1, 100, 1)"))
+        connection.execute(text("INSERT INTO archived_expenses (id, amount_cents, owner_id) VALUES (5, 500, 1)"))
+
+    assert migrate_expense_ids_autoincrement(engine, Expense.__table__, ArchivedExpense.__table__)
+    assert not migrate_expense_ids_autoincrement(engine, Expense.__table__, ArchivedExpense.__table__)
+
+    with engine.begin() as connection:
+        assert connection.execute(text("SELECT amount_cents FROM expenses WHERE id = 1")).scalar() == 100
+        connection.execute(text("INSERT INTO expenses (amount_cents, owner_id) VALUES (200, 1)"))
+        assert connection.execute(text("SELECT MAX(id) FROM expenses")).scalar() == 6
+    engine.dispose()
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+from home_budget.app import crud
+from home_budget.app.crud import LedgerCRUD
+from home_budget.app.database import session_factories
+from home_budget.app.models import BalanceSnapshot
+
+
+def now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def test_balance_at_replays_from_snapshots(client, login, monkeypatch):
+    monkeypatch.setattr(crud, "BALANCE_SNAPSHOT_INTERVAL", 3)
+    started = now()
+    headers = login("alice@example.com")  # Ledger entry 1: opening balance of 1000.00
+    expense = {"description": "Groceries", "category_id": 1}
+
+    first = client.post("/expenses/", json={**expense, "amount": 10}, headers=headers).json()["id"]
+    before_snapshot = now()
+    second = client.post("/expenses/", json={**expense, "amount": 20}, headers=headers).json()["id"]  # Snapshot at 3
+    after_snapshot = now()
+    client.put(f"/expenses/{first}", json={**expense, "amount": 15}, headers=headers)
+    client.delete(f"/expenses/{second}", headers=headers)
+    after_delete = now()
+    client.post("/expenses/", json={**expense, "amount": 30}, headers=headers)  # Snapshot at 6
+
+    # User 1 lives on shard 1
+    db = session_factories[1]()
+    try:
+        snapshots = db.query(BalanceSnapshot.seq, BalanceSnapshot.balance_cents).order_by(BalanceSnapshot.seq).all()
+        assert snapshots == [(3, 97000), (6, 95500)]
+
+        assert LedgerCRUD.balance_at(db, 1, started) is None
+        assert LedgerCRUD.balance_at(db, 1, before_snapshot)["balance"] == 990
+        assert LedgerCRUD.balance_at(db, 1, after_snapshot)["balance"] == 970
+        assert LedgerCRUD.balance_at(db, 1, after_delete)["balance"] == 985
+        assert LedgerCRUD.balance_at(db, 1, now())["balance"] == 955
+        assert LedgerCRUD.check_consistency(db) == []
+    finally:
+        db.close()
+    assert client.get("/auth/me", headers=headers).json()["balance"] == 955
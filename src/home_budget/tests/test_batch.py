@@ -0,0 +1,22 @@
+def test_rolled_back_batch_is_not_stored_under_its_idempotency_key(client, login):
+    headers = {**login("alice@example.com"), "Idempotency-Key": "batch-1"}
+    batch = {
+        "mode": "all_or_nothing",
+        "operations": [
+            {"op": "create", "expense": {"amount": 10, "description": "Lunch", "category_id": 1}},
+            {"op": "create", "expense": {"amount": 5000, "description": "Car", "category_id": 1}}
+        ]
+    }
+    failed = client.post("/batch", json=batch, headers=headers)
+    assert failed.json()["committed"] is False
+
+    # The retry is applied again rather than replayed
+    retried = client.post("/batch", json=batch, headers=headers)
+    assert "Idempotent-Replayed" not in retried.headers
+    assert retried.json()["committed"] is False
+
+    # The key is still free for a corrected batch
+    batch["operations"][1]["expense"]["amount"] = 500
+    corrected = client.post("/batch", json=batch, headers=headers)
+    assert corrected.json()["committed"] is True
+    assert len(client.get("/expenses/", headers=headers).json()) == 2
@@ -0,0 +1,45 @@
+import calendar
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pytest
+
+from home_budget.app.forecast import SpendingForecast
+
+
+def test_model_projects_steady_spending():
+    # 10.00 a day on category 0 for four full weeks of March, so every weekday weighs the same
+    first_day, today = date(2026, 3, 1), date(2026, 3, 28)
+    days = np.arange(28)
+    projection = SpendingForecast.model(days, np.zeros(28, dtype=int), np.full(28, 10.0), 1, first_day, today, 0.3)
+
+    assert projection["average_daily_spending"][0] == pytest.approx(10.0)
+    assert projection["spent_to_date"][0] == pytest.approx(280.0)
+    assert projection["projected_month_end"][0] == pytest.approx(310.0)  # Plus March 29-31
+    assert projection["projected_next_month"][0] == pytest.approx(300.0)  # 30 days of April
+
+
+def test_forecast_is_cached_until_expenses_change(client, login):
+    headers = login("alice@example.com")
+    expense = {"description": "Groceries", "category_id": 1}
+    client.post("/expenses/", json={**expense, "amount": 30}, headers=headers)
+
+    today = datetime.now(timezone.utc).date()
+    days_left = calendar.monthrange(today.year, today.month)[1] - today.day
+
+    first = client.get("/analytics/forecast", headers=headers).json()
+    assert first["cached"] is False
+    assert first["history_days"] == 1
+    assert first["spent_to_date"] == 30
+    assert first["projected_month_end"] == pytest.approx(30 + 30 * days_left)
+
+    again = client.get("/analytics/forecast", headers=headers).json()
+    assert again["cached"] is True
+    assert again["projected_month_end"] == first["projected_month_end"]
+
+    client.post("/expenses/", json={**expense, "amount": 10}, headers=headers)
+    changed = client.get("/analytics/forecast", headers=headers).json()
+    assert changed["cached"] is False
+    assert changed["data_version"] > first["data_version"]
+    assert changed["spent_to_date"] == 40
+    assert changed["projected_month_end"] == pytest.approx(40 + 40 * days_left)
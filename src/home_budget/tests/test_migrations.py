@@ -0,0 +1,25 @@
+from sqlalchemy import create_engine, text
+
+from home_budget.app.migrations import migrate_money_to_cents
+from home_budget.app.money import to_cents
+
+
+def test_money_migration_rounds_half_cents_like_the_api(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    amounts = [0.285, 1.005, 12.5, 0.1, None]
+    with engine.begin() as connection:
+        # The expenses table as created before money was stored in cents
+        connection.execute(text("CREATE TABLE expenses (id INTEGER PRIMARY KEY, amount FLOAT, owner_id INTEGER)"))
+        connection.execute(
+            text("INSERT INTO expenses (id, amount, owner_id) VALUES (:id, :amount, 1)"),
+            [{"id": index, "amount": amount} for index, amount in enumerate(amounts, start=1)]
+        )
+
+    assert migrate_money_to_cents(engine) == 1
+    assert migrate_money_to_cents(engine) == 0
+
+    with engine.connect() as connection:
+        migrated = connection.execute(text("SELECT amount_cents FROM expenses ORDER BY id")).scalars().all()
+    engine.dispose()
+    assert migrated == [29, 101, 1250, 10, 0]
+    assert migrated[:4] == [to_cents(amount) for amount in amounts[:4]]
@@ -0,0 +1,24 @@
+import msgpack
+
+
+def test_json_and_msgpack_responses_both_vary_on_accept(client, login):
+    headers = login("alice@example.com")
+
+    as_json = client.get("/expenses/", headers=headers)
+    as_msgpack = client.get("/expenses/", headers={**headers, "Accept": "application/msgpack"})
+
+    assert as_json.headers["content-type"].startswith("application/json")
+    assert as_msgpack.headers["content-type"] == "application/msgpack"
+    for response in (as_json, as_msgpack):
+        assert "Accept" in [field.strip() for field in response.headers["vary"].split(",")]
+
+
+def test_msgpack_expense_dates_match_json(client, login):
+    headers = login("alice@example.com")
+    client.post("/expenses/", json={"amount": 10, "description": "Lunch", "category_id": 1}, headers=headers)
+
+    as_json = client.get("/expenses/", headers=headers).json()
+    as_msgpack = msgpack.unpackb(client.get("/expenses/", headers={**headers, "Accept": "application/msgpack"}).content)
+
+    assert as_msgpack == as_json
+    assert isinstance(as_msgpack[0]["date"], str)
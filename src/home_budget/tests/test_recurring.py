@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+from home_budget.app.crud import LedgerCRUD
+from home_budget.app.database import session_factories
+from home_budget.app.models import User
+from home_budget.app.recurring import run_tick
+from home_budget.app.schemas import ExpenseCreate
+from home_budget.app.services import ExpenseService
+
+
+def test_expense_write_keeps_a_scheduler_deduction_made_after_the_user_was_loaded(client, login):
+    headers = login("alice@example.com")
+    start_date = datetime.now(timezone.utc) - timedelta(hours=1)
+    rule = {"amount": 100, "description": "Rent", "category_id": 1, "frequency": "monthly", "start_date": start_date.isoformat()}
+    assert client.post("/recurring/", json=rule, headers=headers).status_code == 200
+
+    # User 1 lives on shard 1
+    db = session_factories[1]()
+    try:
+        user = db.get(User, 1)
+        assert user.balance_cents == 100000
+        run_tick()
+
+        ExpenseService.create(db, user, ExpenseCreate(amount=10, description="Lunch", category_id=1))
+        db.commit()
+
+        assert user.balance_cents == 89000
+        assert LedgerCRUD.check_consistency(db) == []
+    finally:
+        db.close()
+    assert client.get("/auth/me", headers=headers).json()["balance"] == 890
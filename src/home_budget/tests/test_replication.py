@@ -0,0 +1,23 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from home_budget.app import replication
+from home_budget.app.database import Base
+from home_budget.app.replication import ReplicaRouter
+
+
+def test_category_reads_follow_category_writes_to_the_primary(client, tmp_path, monkeypatch):
+    # A shard 0 replica that has not caught up with anything yet
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=replica)
+    monkeypatch.setattr(replication, "replica_engines", [[replica], []])
+    monkeypatch.setattr(replication, "replica_session_factories", [[sessionmaker(bind=replica)], []])
+    monkeypatch.setattr(ReplicaRouter, "_active", [[0], []])
+    monkeypatch.setattr(ReplicaRouter, "_last_write", {})
+
+    assert client.get("/categories/").json() == []
+
+    created = client.post("/categories/", json={"name": "Pets"}).json()
+    assert created in client.get("/categories/").json()
+    assert client.get(f"/categories/{created['id']}").status_code == 200
+    replica.dispose()
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from home_budget.app.crud import ArchiveCRUD
+from home_budget.app.database import session_factories
+from home_budget.app.models import Expense
+from home_budget.app.sharding import ShardRouter
+
+
+def sync(client, headers, since, expenses):
+    """Apply the change feed since a sequence number to a client's expenses by ID"""
+    changes = client.get("/expenses/changes", params={"since": since}, headers=headers).json()
+    for expense_id in changes["deleted"]:
+        expenses.pop(expense_id, None)
+    for expense in changes["upserted"]:
+        expenses[expense["id"]] = expense
+    return changes["high_water_mark"]
+
+
+def test_move_user_keeps_expenses_when_old_and_new_ids_overlap(client, login):
+    # User 1 lives on shard 1 and takes expense ID 1 there
+    alice = login("alice@example.com")
+    assert client.post("/expenses/", json={"amount": 5, "description": "Lunch", "category_id": 1}, headers=alice).json()["id"] == 1
+    # User 2 lives on shard 0 with expenses 1 and 2
+    bob = login("bob@example.com")
+    for amount in (10, 20):
+        client.post("/expenses/", json={"amount": amount, "description": "Groceries", "category_id": 1}, headers=bob)
+
+    expenses = {}
+    since = sync(client, bob, 0, expenses)
+    assert sorted(expenses) == [1, 2]
+
+    assert ShardRouter.move_user(2, 1)
+
+    # On shard 1 the moved expenses become 2 and 3: old ID 2 is also a new ID
+    sync(client, bob, since, expenses)
+    assert sorted(expenses) == [2, 3]
+    assert sorted(expense["amount"] for expense in expenses.values()) == [10, 20]
+    listed = client.get("/expenses/", headers=bob).json()
+    assert sorted(expense["id"] for expense in listed) == sorted(expenses)
+
+
+def test_move_user_keeps_archived_expenses_visible(client, login):
+    # User 2 lives on shard 0, with one expense archived there and one hot
+    login("alice@example.com")
+    bob = login("bob@example.com")
+    for amount in (100, 5):
+        client.post("/expenses/", json={"amount": amount, "description": "Groceries", "category_id": 1}, headers=bob)
+    db = session_factories[0]()
+    try:
+        db.execute(update(Expense).where(Expense.id == 1).values(date=datetime.now() - timedelta(days=60)))
+        db.commit()
+        assert ArchiveCRUD.archive_before(db, datetime.now() - timedelta(days=30)) == 1
+    finally:
+        db.close()
+
+    def visible():
+        expenses = client.get("/expenses/", headers=bob).json()
+        total = client.get("/analytics/spending/total", params={"period": "quarter"}, headers=bob).json()
+        return len(expenses), total["total_spent"]
+
+    assert visible() == (2, 105.0)
+
+    # Shard 1 has never archived anything, so it has no watermark of its own
+    assert ShardRouter.move_user(2, 1)
+    assert visible() == (2, 105.0)